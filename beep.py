@@ -26,14 +26,40 @@ except ImportError:
         GPIO_MANAGER_AVAILABLE = False
         print("蜂鸣器: GPIO不可用")
 
+# pigpio守护进程可用时由DMA产生方波（可选）
+try:
+    import pigpio
+    PIGPIO_AVAILABLE = True
+except ImportError:
+    PIGPIO_AVAILABLE = False
+
+import os
+import mmap
+import ctypes
 import time
 import signal
 import sys
+import threading
+from array import array
+from types import MappingProxyType
 
 # GPIO设置 - 使用BOARD模式与HX711保持一致
 BEEP_PIN_BCM = 18  # BCM编号
 BEEP_PIN_BOARD = 12  # 对应的物理引脚号
 
+# 简单的BCM到BOARD转换（仅支持常用引脚），只读
+BCM_TO_BOARD = MappingProxyType({
+    2: 3, 3: 5, 4: 7, 17: 11, 27: 13, 22: 15,
+    10: 19, 9: 21, 11: 23, 5: 29, 6: 31,
+    13: 33, 19: 35, 26: 37, 14: 8, 15: 10,
+    18: 12, 23: 16, 24: 18, 25: 22, 8: 24,
+    7: 26, 12: 32, 16: 36, 20: 38, 21: 40
+})
+
+# BCM2835 GPIO寄存器（/dev/gpiomem中的32位字偏移）
+GPSET0 = 0x1C // 4  # 置位寄存器
+GPCLR0 = 0x28 // 4  # 清零寄存器
+
 # 音符频率定义
 NOTE_B0 = 31
 NOTE_C1 = 33
@@ -125,31 +151,204 @@ NOTE_CS8 = 4435
 NOTE_D8 = 4699
 NOTE_DS8 = 4978
 
+# 节拍参数
+BPM = 137
+# 12000 = 60 * 1000 * 4 * 0.8 / 16 quarter note = one beat
+NDMS = 12000
+
+# Bad Apple旋律数据文件：N个小端uint16音高 + N个uint8时长
+# 时长单位为1/16音符；前奏和尾声中连续的同音高音符已按游程编码合并
+MELODY_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "melody.bin")
+
+def _compose_melody():
+    """
+    按乐段结构生成旋律：重复的乐句只写一次，再按曲式拼接
+    与melody.bin内容完全一致，数据文件缺失时作为后备
+    :return: (音高数组, 时长数组)
+    """
+    def phrase(notes, long_at=()):
+        # 乐句中的音符默认为2个1/16音符，long_at中的位置为4个
+        return [(n, 4 if i in long_at else 2) for i, n in enumerate(notes)]
+    
+    # 低音部分
+    bass_a = [(NOTE_DS3, 4), (0, 1), (NOTE_DS3, 1), (NOTE_CS3, 1), (NOTE_DS3, 1)]
+    bass_b = [(NOTE_DS3, 2), (NOTE_DS3, 1), (NOTE_FS3, 1), (NOTE_GS3, 2), (NOTE_FS3, 1), (NOTE_GS3, 1)]
+    bass_c = [(NOTE_GS3, 2), (NOTE_FS3, 1), (NOTE_GS3, 1), (NOTE_FS3, 2), (NOTE_DS3, 1), (NOTE_FS3, 1)]
+    bass = (bass_a * 3 + bass_b + bass_a * 3 + bass_c) * 2
+    
+    # 主歌
+    verse_head = phrase([NOTE_DS4, NOTE_F4, NOTE_FS4, NOTE_GS4, NOTE_AS4, NOTE_DS5, NOTE_CS5,
+                         NOTE_AS4, NOTE_DS4, NOTE_AS4, NOTE_GS4, NOTE_FS4, NOTE_F4, NOTE_DS4,
+                         NOTE_F4, NOTE_FS4, NOTE_GS4, NOTE_AS4, NOTE_GS4, NOTE_FS4], (4, 7, 8, 17))
+    verse_end_a = phrase([NOTE_F4, NOTE_DS4, NOTE_F4, NOTE_FS4, NOTE_F4, NOTE_DS4, NOTE_D4, NOTE_F4])
+    verse_end_b = phrase([NOTE_F4, NOTE_FS4, NOTE_GS4, NOTE_AS4], (0, 1, 2, 3))
+    verse = (verse_head + verse_end_a + verse_head + verse_end_b) * 2
+    
+    # 副歌：7音符乐句 [CS5,DS5,AS4,GS4,AS4,GS4,AS4] 反复出现
+    hook_head = phrase([NOTE_CS5, NOTE_DS5, NOTE_AS4, NOTE_GS4, NOTE_AS4], (4,))
+    hook_tail = phrase([NOTE_GS4, NOTE_AS4])
+    hook = hook_head + hook_tail
+    fall = phrase([NOTE_GS4, NOTE_FS4, NOTE_F4, NOTE_CS4, NOTE_DS4], (4,))
+    climb = phrase([NOTE_CS4, NOTE_DS4, NOTE_F4, NOTE_FS4, NOTE_GS4, NOTE_AS4, NOTE_DS4], (6,))
+    pickup = phrase([NOTE_AS4, NOTE_CS5])
+    peak = phrase([NOTE_DS5, NOTE_F5, NOTE_FS5, NOTE_F5, NOTE_DS5, NOTE_CS5, NOTE_AS4], (6,))
+    chorus = (hook * 2 + fall + climb + pickup) * 3 + hook + hook_head + peak + hook_tail + fall
+    
+    # 尾声：副歌结构移调
+    outro_hook = phrase([NOTE_B4, NOTE_D5, NOTE_D5, NOTE_E5, NOTE_B4, NOTE_A4, NOTE_B4,
+                         NOTE_A4, NOTE_B4, NOTE_D5, NOTE_E5, NOTE_B4, NOTE_A4, NOTE_B4], (6, 13))
+    outro_fall = phrase([NOTE_A4, NOTE_B4, NOTE_A4, NOTE_G4, NOTE_FS4, NOTE_D4, NOTE_E4], (6,))
+    outro_climb = phrase([NOTE_D4, NOTE_E4, NOTE_FS4, NOTE_G4, NOTE_A4, NOTE_B4, NOTE_E4], (6,))
+    outro_peak = phrase([NOTE_E5, NOTE_FS5, NOTE_G5, NOTE_FS5, NOTE_E5, NOTE_D5, NOTE_B4], (6,))
+    outro = (outro_hook + outro_fall + outro_climb) * 3 + outro_hook + outro_peak + outro_fall
+    
+    # 前奏48个连续DS2、结尾23个连续E4已按游程编码合并
+    song = ([(NOTE_DS2, 128)] + bass + verse + chorus + pickup + chorus + [(0, 4)]
+            + bass + verse + chorus + outro
+            + [(0, 4), (NOTE_E4, 62), (0, 2), (0, 16)])
+    
+    melody = array('H', (n for n, _ in song))
+    durations = array('B', (d for _, d in song))
+    return melody, durations
+
+def _load_melody(path=MELODY_FILE):
+    """
+    以只读内存映射方式加载旋律文件，由操作系统按需换页并在进程间共享，
+    导入时不复制、不解析数据
+    :return: (音高序列, 时长序列)
+    """
+    try:
+        with open(path, 'rb') as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError) as e:
+        print(f"蜂鸣器: 无法读取旋律文件，按乐段结构生成: {e}")
+        return _compose_melody()
+    
+    n = len(mm) // 3
+    view = memoryview(mm)
+    if sys.byteorder == 'little':
+        melody = view[:2 * n].cast('H')
+    else:
+        # 大端平台无法直接按小端解释，复制一份并交换字节序
+        melody = array('H', view[:2 * n].tobytes())
+        melody.byteswap()
+    durations = view[2 * n:]
+    return melody, durations
+
+MELODY, NOTE_DURATIONS_16 = _load_melody()
+
+# 预先计算每个音符的时长和音符间停顿（毫秒），播放时不再做算术
+NOTE_DURATIONS_MS = array('f', (NDMS * d / BPM for d in NOTE_DURATIONS_16))
+NOTE_PAUSES_MS = array('f', (d / 4 for d in NOTE_DURATIONS_MS))
+# 每个音符之后的等待时间(秒)；休止符的时长与停顿合并为一次等待
+NOTE_RELEASE_S = array('f', ((p if f else d + p) / 1000.0
+                             for f, d, p in zip(MELODY, NOTE_DURATIONS_MS, NOTE_PAUSES_MS)))
+
+# 播放进度显示间隔(秒)
+PROGRESS_INTERVAL = 10
+
+# 旋律只用到二十余个音高，预先按音高计算半周期(纳秒)、按(音高, 时长)计算周期数，
+# 软件方波播放时查表即可，不再逐音符做浮点运算
+# 全部使用整数纳秒运算，周期数 = 音符总时长 // 完整周期
+HALF_PERIOD_NS = {f: 500_000_000 // f for f in set(MELODY) if f}
+NOTE_CYCLES = {(f, d): int(d * 1_000_000) // (2 * HALF_PERIOD_NS[f])
+               for f, d in zip(MELODY, NOTE_DURATIONS_MS) if f}
+
+def _map_gpio_registers():
+    """
+    映射/dev/gpiomem，直接读写GPIO寄存器
+    :return: 按32位字索引的寄存器数组，不可用时返回None
+    """
+    try:
+        fd = os.open("/dev/gpiomem", os.O_RDWR | os.O_SYNC)
+    except OSError:
+        return None
+    try:
+        mm = mmap.mmap(fd, 4096, mmap.MAP_SHARED, mmap.PROT_READ | mmap.PROT_WRITE)
+    except OSError:
+        return None
+    finally:
+        os.close(fd)
+    return (ctypes.c_uint32 * 1024).from_buffer(mm)
+
+def _square_wave_regs(regs, mask, cycles, half_ns, player):
+    """
+    软件方波的寄存器版本：直接写GPSET0/GPCLR0，不经过RPi.GPIO
+    :param regs: _map_gpio_registers()返回的寄存器数组
+    :param mask: 引脚位掩码 (1 << BCM编号)
+    :param cycles: 周期数
+    :param half_ns: 半周期时间(纳秒)
+    :param player: 播放器对象，检查其stop_playing标志以提前停止
+    """
+    now = time.perf_counter_ns
+    next_edge = now()
+    for i in range(cycles):
+        # 每64个周期检查一次停止标志，减少热循环中的属性访问
+        if not i & 63 and player.stop_playing:
+            break
+        regs[GPSET0] = mask
+        next_edge += half_ns
+        while now() < next_edge:
+            pass
+        regs[GPCLR0] = mask
+        next_edge += half_ns
+        while now() < next_edge:
+            pass
+
+def _square_wave(out, pin, hi, lo, cycles, half_ns, player):
+    """
+    软件方波：逐半周期翻转引脚，供PWM不可用时使用
+    :param out: GPIO输出函数 out(pin, value)
+    :param pin: 引脚号
+    :param hi: 高电平值 (GPIO.HIGH)
+    :param lo: 低电平值 (GPIO.LOW)
+    :param cycles: 周期数
+    :param half_ns: 半周期时间(纳秒)
+    :param player: 播放器对象，检查其stop_playing标志以提前停止
+    """
+    # 热循环中只使用局部变量和参数，省去全局变量和属性查找
+    now = time.perf_counter_ns
+    # 忙等代替time.sleep（约1ms调度粒度会导致音高失真）
+    # 边沿时刻在上一个边沿基础上累加，误差不会随周期累积
+    next_edge = now()
+    for i in range(cycles):
+        # 每64个周期检查一次停止标志，减少热循环中的属性访问
+        if not i & 63 and player.stop_playing:
+            break
+        out(pin, hi)
+        next_edge += half_ns
+        while now() < next_edge:
+            pass
+        out(pin, lo)
+        next_edge += half_ns
+        while now() < next_edge:
+            pass
+
 class BadAppleBuzzer:
     def __init__(self, beep_pin=18):
         # 将BCM引脚号转换为BOARD引脚号
         self.beep_pin_bcm = beep_pin
-        if beep_pin == 18:
-            self.beep_pin = 12  # GPIO18对应物理引脚12
-        else:
-            # 简单的BCM到BOARD转换（仅支持常用引脚）
-            bcm_to_board = {
-                2: 3, 3: 5, 4: 7, 17: 11, 27: 13, 22: 15,
-                10: 19, 9: 21, 11: 23, 5: 29, 6: 31,
-                13: 33, 19: 35, 26: 37, 14: 8, 15: 10,
-                18: 12, 23: 16, 24: 18, 25: 22, 8: 24,
-                7: 26, 12: 32, 16: 36, 20: 38, 21: 40
-            }
-            self.beep_pin = bcm_to_board.get(beep_pin, 12)
+        self.beep_pin = BCM_TO_BOARD.get(beep_pin, BEEP_PIN_BOARD)
         
         self.stop_playing = False  # 添加停止标志
         self.gpio_initialized = False
+        self.pi = None  # pigpio连接，由DMA波形引擎产生方波
+        self._waves = {}  # 频率 -> 单周期波形ID
+        self.pwm = None  # PWM对象，由PWM外设产生方波
+        self._gpio_regs = None  # 映射的GPIO寄存器，PWM不可用时用于软件方波
+        self._play_thread = None  # 播放线程
+        self._progress = 0  # 已播放的音符数，由播放线程更新
+        self._stop_event = threading.Event()  # 停止时唤醒正在等待的音符
+        self._out = None  # GPIO输出函数，在setup_gpio中选定
         self.setup_gpio()
         signal.signal(signal.SIGINT, self.cleanup_and_exit)
         
     def setup_gpio(self):
         """设置GPIO - 使用GPIO管理器或直接控制"""
         try:
+            # 一次性选定输出函数，播放时不再逐次判断GPIO_MANAGER_AVAILABLE
+            self._out = output if GPIO_MANAGER_AVAILABLE else GPIO.output
+            
             if GPIO_MANAGER_AVAILABLE:
                 # 使用GPIO管理器
                 if not gpio_manager.gpio_initialized:
@@ -162,6 +361,7 @@ class BadAppleBuzzer:
                 if allocate_pin(self.beep_pin, "BadAppleBuzzer", GPIO.OUT):
                     output(self.beep_pin, GPIO.LOW)
                     self.gpio_initialized = True
+                    self._setup_pwm()
                     print(f"蜂鸣器: GPIO引脚已通过管理器分配 (BOARD:{self.beep_pin}, BCM:{self.beep_pin_bcm})")
                 else:
                     print("蜂鸣器: GPIO引脚分配失败")
@@ -187,21 +387,59 @@ class BadAppleBuzzer:
                 GPIO.setup(self.beep_pin, GPIO.OUT)
                 GPIO.output(self.beep_pin, GPIO.LOW)
                 self.gpio_initialized = True
+                self._setup_pwm()
                 print(f"蜂鸣器: GPIO引脚直接配置完成 (BOARD:{self.beep_pin}, BCM:{self.beep_pin_bcm})")
             
+            # PWM不可用时，软件方波优先直接写GPIO寄存器
+            if self.pi is None and self.pwm is None:
+                self._gpio_regs = _map_gpio_registers()
+                if self._gpio_regs is not None:
+                    print("蜂鸣器: 软件方波使用/dev/gpiomem直接寄存器访问")
+            
         except Exception as e:
             print(f"蜂鸣器GPIO初始化失败: {e}")
             self.gpio_initialized = False
     
-    def _gpio_output(self, pin, value):
-        """统一的GPIO输出方法"""
-        if not self.gpio_initialized:
-            return
+    def _setup_pwm(self):
+        """优先连接pigpio，其次创建PWM对象，都失败时回退到软件方波"""
+        if PIGPIO_AVAILABLE:
+            try:
+                pi = pigpio.pi()
+                if pi.connected:
+                    # pigpio使用BCM编号
+                    pi.set_mode(self.beep_pin_bcm, pigpio.OUTPUT)
+                    pi.wave_clear()
+                    self.pi = pi
+                    print("蜂鸣器: 使用pigpio DMA波形输出方波")
+                    return
+                print("蜂鸣器: pigpio守护进程未运行，改用PWM")
+            except Exception as e:
+                print(f"蜂鸣器: pigpio不可用: {e}")
         
-        if GPIO_MANAGER_AVAILABLE:
-            output(pin, value)
-        else:
-            GPIO.output(pin, value)
+        try:
+            self.pwm = GPIO.PWM(self.beep_pin, 1000)
+            print("蜂鸣器: 使用PWM输出方波")
+        except Exception as e:
+            print(f"蜂鸣器: PWM不可用，使用软件方波: {e}")
+            self.pwm = None
+    
+    def _get_wave(self, frequency):
+        """
+        获取指定频率的单周期pigpio波形，首次使用时创建并缓存
+        :param frequency: 频率(Hz)
+        :return: 波形ID
+        """
+        wid = self._waves.get(frequency)
+        if wid is None:
+            mask = 1 << self.beep_pin_bcm
+            half_us = max(1, HALF_PERIOD_NS.get(frequency, 500_000_000 // int(frequency)) // 1000)
+            self.pi.wave_add_generic([
+                pigpio.pulse(mask, 0, half_us),
+                pigpio.pulse(0, mask, half_us),
+            ])
+            wid = self.pi.wave_create()
+            self._waves[frequency] = wid
+        return wid
     
     def tone(self, frequency, duration):
         """
@@ -214,372 +452,120 @@ class BadAppleBuzzer:
             
         if frequency == 0:
             # 静音
-            time.sleep(duration / 1000.0)
+            self._stop_event.wait(duration / 1000.0)
             return
-            
-        # 计算半周期时间
-        period = 1.0 / frequency
-        half_period = period / 2.0
         
-        # 计算需要的周期数
-        cycles = int((duration / 1000.0) * frequency)
+        if self.pi is not None:
+            # DMA循环发送单周期波形，Python只需等待音符结束
+            try:
+                self.pi.wave_send_repeat(self._get_wave(frequency))
+                self._stop_event.wait(duration / 1000.0)
+                self.pi.wave_tx_stop()
+                self.pi.write(self.beep_pin_bcm, 0)
+            except Exception as e:
+                print(f"蜂鸣器输出错误: {e}")
+            return
+        
+        if self.pwm is not None:
+            # PWM外设产生方波，Python只需等待音符结束
+            try:
+                self.pwm.ChangeFrequency(frequency)
+                self.pwm.start(50)
+                self._stop_event.wait(duration / 1000.0)
+                self.pwm.stop()
+            except Exception as e:
+                print(f"蜂鸣器输出错误: {e}")
+            return
+            
+        # 软件方波（PWM不可用时的回退路径）
+        # 旋律中的音符直接查表，其他调用再计算半周期和周期数
+        half_ns = HALF_PERIOD_NS.get(frequency)
+        if half_ns is None:
+            half_ns = 500_000_000 // int(frequency)
+        cycles = NOTE_CYCLES.get((frequency, duration))
+        if cycles is None:
+            total_ns = int(duration * 1_000_000)
+            cycles = total_ns // (2 * half_ns)
         
         try:
-            for _ in range(cycles):
-                if self.stop_playing:
-                    break
-                self._gpio_output(self.beep_pin, GPIO.HIGH)
-                time.sleep(half_period)
-                self._gpio_output(self.beep_pin, GPIO.LOW)
-                time.sleep(half_period)
+            if self._gpio_regs is not None:
+                _square_wave_regs(self._gpio_regs, 1 << self.beep_pin_bcm, cycles, half_ns, self)
+            else:
+                _square_wave(self._out, self.beep_pin, GPIO.HIGH, GPIO.LOW, cycles, half_ns, self)
         except Exception as e:
             print(f"蜂鸣器输出错误: {e}")
     
     def play_melody(self):
-        """播放Bad Apple完整旋律"""
+        """播放Bad Apple完整旋律（在独立线程中播放，调用方阻塞至播放结束）"""
         print("开始播放Bad Apple旋律...")
         print("按Ctrl+C停止播放")
         
-        bpm = 137
-        # 12000 = 60 * 1000 * 4 * 0.8 / 16 quarter note = one beat
-        ndms = 12000
-        
-        # Bad Apple旋律数据 - 完整版本
-        melody = [
-            # # Intro
-            NOTE_DS2, NOTE_DS2, NOTE_DS2, NOTE_DS2, NOTE_DS2, NOTE_DS2, NOTE_DS2,
-            NOTE_DS2, NOTE_DS2, NOTE_DS2, NOTE_DS2, NOTE_DS2,
-            NOTE_DS2, NOTE_DS2, NOTE_DS2, NOTE_DS2, NOTE_DS2, NOTE_DS2, NOTE_DS2,
-            NOTE_DS2, NOTE_DS2, NOTE_DS2, NOTE_DS2, NOTE_DS2,
-             NOTE_DS2, NOTE_DS2, NOTE_DS2, NOTE_DS2, NOTE_DS2, NOTE_DS2, NOTE_DS2,
-            NOTE_DS2, NOTE_DS2, NOTE_DS2, NOTE_DS2, NOTE_DS2,
-            NOTE_DS2, NOTE_DS2, NOTE_DS2, NOTE_DS2, NOTE_DS2, NOTE_DS2, NOTE_DS2,
-            NOTE_DS2, NOTE_DS2, NOTE_DS2, NOTE_DS2, NOTE_DS2,
-            NOTE_DS3, 0, NOTE_DS3, NOTE_CS3, NOTE_DS3, NOTE_DS3, 0, NOTE_DS3, NOTE_CS3, NOTE_DS3,
-             NOTE_DS3, 0, NOTE_DS3, NOTE_CS3, NOTE_DS3, NOTE_DS3, NOTE_DS3, NOTE_FS3, NOTE_GS3, NOTE_FS3, NOTE_GS3,
-            NOTE_DS3, 0, NOTE_DS3, NOTE_CS3, NOTE_DS3, NOTE_DS3, 0, NOTE_DS3, NOTE_CS3, NOTE_DS3,
-            NOTE_DS3, 0, NOTE_DS3, NOTE_CS3, NOTE_DS3, NOTE_GS3, NOTE_FS3, NOTE_GS3, NOTE_FS3, NOTE_DS3, NOTE_FS3,
-            NOTE_DS3, 0, NOTE_DS3, NOTE_CS3, NOTE_DS3, NOTE_DS3, 0, NOTE_DS3, NOTE_CS3, NOTE_DS3,
-            NOTE_DS3, 0, NOTE_DS3, NOTE_CS3, NOTE_DS3, NOTE_DS3, NOTE_DS3, NOTE_FS3, NOTE_GS3, NOTE_FS3, NOTE_GS3,
-            NOTE_DS3, 0, NOTE_DS3, NOTE_CS3, NOTE_DS3, NOTE_DS3, 0, NOTE_DS3, NOTE_CS3, NOTE_DS3,
-            NOTE_DS3, 0, NOTE_DS3, NOTE_CS3, NOTE_DS3, NOTE_GS3, NOTE_FS3, NOTE_GS3, NOTE_FS3, NOTE_DS3, NOTE_FS3,
-            
-            # Verse 1 - 16
-            NOTE_DS4, NOTE_F4, NOTE_FS4, NOTE_GS4, NOTE_AS4, NOTE_DS5, NOTE_CS5,
-            NOTE_AS4, NOTE_DS4, NOTE_AS4, NOTE_GS4, NOTE_FS4, NOTE_F4,
-            NOTE_DS4, NOTE_F4, NOTE_FS4, NOTE_GS4, NOTE_AS4, NOTE_GS4, NOTE_FS4,
-            NOTE_F4, NOTE_DS4, NOTE_F4, NOTE_FS4, NOTE_F4, NOTE_DS4, NOTE_D4, NOTE_F4,
-            NOTE_DS4, NOTE_F4, NOTE_FS4, NOTE_GS4, NOTE_AS4, NOTE_DS5, NOTE_CS5,
-            NOTE_AS4, NOTE_DS4, NOTE_AS4, NOTE_GS4, NOTE_FS4, NOTE_F4,
-            NOTE_DS4, NOTE_F4, NOTE_FS4, NOTE_GS4, NOTE_AS4, NOTE_GS4, NOTE_FS4,
-            NOTE_F4, NOTE_FS4, NOTE_GS4, NOTE_AS4,
-            NOTE_DS4, NOTE_F4, NOTE_FS4, NOTE_GS4, NOTE_AS4, NOTE_DS5, NOTE_CS5,
-            NOTE_AS4, NOTE_DS4, NOTE_AS4, NOTE_GS4, NOTE_FS4, NOTE_F4,
-            NOTE_DS4, NOTE_F4, NOTE_FS4, NOTE_GS4, NOTE_AS4, NOTE_GS4, NOTE_FS4,
-            NOTE_F4, NOTE_DS4, NOTE_F4, NOTE_FS4, NOTE_F4, NOTE_DS4, NOTE_D4, NOTE_F4,
-            NOTE_DS4, NOTE_F4, NOTE_FS4, NOTE_GS4, NOTE_AS4, NOTE_DS5, NOTE_CS5,
-            NOTE_AS4, NOTE_DS4, NOTE_AS4, NOTE_GS4, NOTE_FS4, NOTE_F4,
-            NOTE_DS4, NOTE_F4, NOTE_FS4, NOTE_GS4, NOTE_AS4, NOTE_GS4, NOTE_FS4,
-            NOTE_F4, NOTE_FS4, NOTE_GS4, NOTE_AS4,
-            
-            # Verse 17 - 32
-            NOTE_CS5, NOTE_DS5, NOTE_AS4, NOTE_GS4, NOTE_AS4, NOTE_GS4, NOTE_AS4,
-            NOTE_CS5, NOTE_DS5, NOTE_AS4, NOTE_GS4, NOTE_AS4, NOTE_GS4, NOTE_AS4,
-            NOTE_GS4, NOTE_FS4, NOTE_F4, NOTE_CS4, NOTE_DS4, NOTE_CS4, NOTE_DS4,
-            NOTE_F4, NOTE_FS4, NOTE_GS4, NOTE_AS4, NOTE_DS4, NOTE_AS4, NOTE_CS5,
-            NOTE_CS5, NOTE_DS5, NOTE_AS4, NOTE_GS4, NOTE_AS4, NOTE_GS4, NOTE_AS4,
-            NOTE_CS5, NOTE_DS5, NOTE_AS4, NOTE_GS4, NOTE_AS4, NOTE_GS4, NOTE_AS4,
-            NOTE_GS4, NOTE_FS4, NOTE_F4, NOTE_CS4, NOTE_DS4, NOTE_CS4, NOTE_DS4,
-            NOTE_F4, NOTE_FS4, NOTE_GS4, NOTE_AS4, NOTE_DS4, NOTE_AS4, NOTE_CS5,
-            NOTE_CS5, NOTE_DS5, NOTE_AS4, NOTE_GS4, NOTE_AS4, NOTE_GS4, NOTE_AS4,
-            NOTE_CS5, NOTE_DS5, NOTE_AS4, NOTE_GS4, NOTE_AS4, NOTE_GS4, NOTE_AS4,
-            NOTE_GS4, NOTE_FS4, NOTE_F4, NOTE_CS4, NOTE_DS4, NOTE_CS4, NOTE_DS4,
-            NOTE_F4, NOTE_FS4, NOTE_GS4, NOTE_AS4, NOTE_DS4, NOTE_AS4, NOTE_CS5,
-            NOTE_CS5, NOTE_DS5, NOTE_AS4, NOTE_GS4, NOTE_AS4, NOTE_GS4, NOTE_AS4,
-            NOTE_CS5, NOTE_DS5, NOTE_AS4, NOTE_GS4, NOTE_AS4, NOTE_DS5, NOTE_F5,
-            NOTE_FS5, NOTE_F5, NOTE_DS5, NOTE_CS5, NOTE_AS4, NOTE_GS4, NOTE_AS4,
-            NOTE_GS4, NOTE_FS4, NOTE_F4, NOTE_CS4, NOTE_DS4, NOTE_AS4, NOTE_CS5,
-            
-            # Verse 33 - 48
-            NOTE_CS5, NOTE_DS5, NOTE_AS4, NOTE_GS4, NOTE_AS4, NOTE_GS4, NOTE_AS4,
-            NOTE_CS5, NOTE_DS5, NOTE_AS4, NOTE_GS4, NOTE_AS4, NOTE_GS4, NOTE_AS4,
-            NOTE_GS4, NOTE_FS4, NOTE_F4, NOTE_CS4, NOTE_DS4, NOTE_CS4, NOTE_DS4,
-            NOTE_F4, NOTE_FS4, NOTE_GS4, NOTE_AS4, NOTE_DS4, NOTE_AS4, NOTE_CS5,
-            NOTE_CS5, NOTE_DS5, NOTE_AS4, NOTE_GS4, NOTE_AS4, NOTE_GS4, NOTE_AS4,
-            NOTE_CS5, NOTE_DS5, NOTE_AS4, NOTE_GS4, NOTE_AS4, NOTE_GS4, NOTE_AS4,
-            NOTE_GS4, NOTE_FS4, NOTE_F4, NOTE_CS4, NOTE_DS4, NOTE_CS4, NOTE_DS4,
-            NOTE_F4, NOTE_FS4, NOTE_GS4, NOTE_AS4, NOTE_DS4, NOTE_AS4, NOTE_CS5,
-            NOTE_CS5, NOTE_DS5, NOTE_AS4, NOTE_GS4, NOTE_AS4, NOTE_GS4, NOTE_AS4,
-            NOTE_CS5, NOTE_DS5, NOTE_AS4, NOTE_GS4, NOTE_AS4, NOTE_GS4, NOTE_AS4,
-            NOTE_GS4, NOTE_FS4, NOTE_F4, NOTE_CS4, NOTE_DS4, NOTE_CS4, NOTE_DS4,
-            NOTE_F4, NOTE_FS4, NOTE_GS4, NOTE_AS4, NOTE_DS4, NOTE_AS4, NOTE_CS5,
-            NOTE_CS5, NOTE_DS5, NOTE_AS4, NOTE_GS4, NOTE_AS4, NOTE_GS4, NOTE_AS4,
-            NOTE_CS5, NOTE_DS5, NOTE_AS4, NOTE_GS4, NOTE_AS4, NOTE_DS5, NOTE_F5,
-            NOTE_FS5, NOTE_F5, NOTE_DS5, NOTE_CS5, NOTE_AS4, NOTE_GS4, NOTE_AS4,
-            NOTE_GS4, NOTE_FS4, NOTE_F4, NOTE_CS4, NOTE_DS4, 0,
-            
-            # Interlude
-            NOTE_DS3, 0, NOTE_DS3, NOTE_CS3, NOTE_DS3, NOTE_DS3, 0, NOTE_DS3, NOTE_CS3, NOTE_DS3,
-            NOTE_DS3, 0, NOTE_DS3, NOTE_CS3, NOTE_DS3, NOTE_DS3, NOTE_DS3, NOTE_FS3, NOTE_GS3, NOTE_FS3, NOTE_GS3,
-            NOTE_DS3, 0, NOTE_DS3, NOTE_CS3, NOTE_DS3, NOTE_DS3, 0, NOTE_DS3, NOTE_CS3, NOTE_DS3,
-            NOTE_DS3, 0, NOTE_DS3, NOTE_CS3, NOTE_DS3, NOTE_GS3, NOTE_FS3, NOTE_GS3, NOTE_FS3, NOTE_DS3, NOTE_FS3,
-            NOTE_DS3, 0, NOTE_DS3, NOTE_CS3, NOTE_DS3, NOTE_DS3, 0, NOTE_DS3, NOTE_CS3, NOTE_DS3,
-            NOTE_DS3, 0, NOTE_DS3, NOTE_CS3, NOTE_DS3, NOTE_DS3, NOTE_DS3, NOTE_FS3, NOTE_GS3, NOTE_FS3, NOTE_GS3,
-            NOTE_DS3, 0, NOTE_DS3, NOTE_CS3, NOTE_DS3, NOTE_DS3, 0, NOTE_DS3, NOTE_CS3, NOTE_DS3,
-            NOTE_DS3, 0, NOTE_DS3, NOTE_CS3, NOTE_DS3, NOTE_GS3, NOTE_FS3, NOTE_GS3, NOTE_FS3, NOTE_DS3, NOTE_FS3,
-            
-            # Verse(2) 1 - 16 (重复第一段)
-            NOTE_DS4, NOTE_F4, NOTE_FS4, NOTE_GS4, NOTE_AS4, NOTE_DS5, NOTE_CS5,
-            NOTE_AS4, NOTE_DS4, NOTE_AS4, NOTE_GS4, NOTE_FS4, NOTE_F4,
-            NOTE_DS4, NOTE_F4, NOTE_FS4, NOTE_GS4, NOTE_AS4, NOTE_GS4, NOTE_FS4,
-            NOTE_F4, NOTE_DS4, NOTE_F4, NOTE_FS4, NOTE_F4, NOTE_DS4, NOTE_D4, NOTE_F4,
-            NOTE_DS4, NOTE_F4, NOTE_FS4, NOTE_GS4, NOTE_AS4, NOTE_DS5, NOTE_CS5,
-            NOTE_AS4, NOTE_DS4, NOTE_AS4, NOTE_GS4, NOTE_FS4, NOTE_F4,
-            NOTE_DS4, NOTE_F4, NOTE_FS4, NOTE_GS4, NOTE_AS4, NOTE_GS4, NOTE_FS4,
-            NOTE_F4, NOTE_FS4, NOTE_GS4, NOTE_AS4,
-            NOTE_DS4, NOTE_F4, NOTE_FS4, NOTE_GS4, NOTE_AS4, NOTE_DS5, NOTE_CS5,
-            NOTE_AS4, NOTE_DS4, NOTE_AS4, NOTE_GS4, NOTE_FS4, NOTE_F4,
-            NOTE_DS4, NOTE_F4, NOTE_FS4, NOTE_GS4, NOTE_AS4, NOTE_GS4, NOTE_FS4,
-            NOTE_F4, NOTE_DS4, NOTE_F4, NOTE_FS4, NOTE_F4, NOTE_DS4, NOTE_D4, NOTE_F4,
-            NOTE_DS4, NOTE_F4, NOTE_FS4, NOTE_GS4, NOTE_AS4, NOTE_DS5, NOTE_CS5,
-            NOTE_AS4, NOTE_DS4, NOTE_AS4, NOTE_GS4, NOTE_FS4, NOTE_F4,
-            NOTE_DS4, NOTE_F4, NOTE_FS4, NOTE_GS4, NOTE_AS4, NOTE_GS4, NOTE_FS4,
-            NOTE_F4, NOTE_FS4, NOTE_GS4, NOTE_AS4,
-            
-            # Verse(2) 17 - 32 (重复)
-            NOTE_CS5, NOTE_DS5, NOTE_AS4, NOTE_GS4, NOTE_AS4, NOTE_GS4, NOTE_AS4,
-            NOTE_CS5, NOTE_DS5, NOTE_AS4, NOTE_GS4, NOTE_AS4, NOTE_GS4, NOTE_AS4,
-            NOTE_GS4, NOTE_FS4, NOTE_F4, NOTE_CS4, NOTE_DS4, NOTE_CS4, NOTE_DS4,
-            NOTE_F4, NOTE_FS4, NOTE_GS4, NOTE_AS4, NOTE_DS4, NOTE_AS4, NOTE_CS5,
-            NOTE_CS5, NOTE_DS5, NOTE_AS4, NOTE_GS4, NOTE_AS4, NOTE_GS4, NOTE_AS4,
-            NOTE_CS5, NOTE_DS5, NOTE_AS4, NOTE_GS4, NOTE_AS4, NOTE_GS4, NOTE_AS4,
-            NOTE_GS4, NOTE_FS4, NOTE_F4, NOTE_CS4, NOTE_DS4, NOTE_CS4, NOTE_DS4,
-            NOTE_F4, NOTE_FS4, NOTE_GS4, NOTE_AS4, NOTE_DS4, NOTE_AS4, NOTE_CS5,
-            NOTE_CS5, NOTE_DS5, NOTE_AS4, NOTE_GS4, NOTE_AS4, NOTE_GS4, NOTE_AS4,
-            NOTE_CS5, NOTE_DS5, NOTE_AS4, NOTE_GS4, NOTE_AS4, NOTE_GS4, NOTE_AS4,
-            NOTE_GS4, NOTE_FS4, NOTE_F4, NOTE_CS4, NOTE_DS4, NOTE_CS4, NOTE_DS4,
-            NOTE_F4, NOTE_FS4, NOTE_GS4, NOTE_AS4, NOTE_DS4, NOTE_AS4, NOTE_CS5,
-            NOTE_CS5, NOTE_DS5, NOTE_AS4, NOTE_GS4, NOTE_AS4, NOTE_GS4, NOTE_AS4,
-            NOTE_CS5, NOTE_DS5, NOTE_AS4, NOTE_GS4, NOTE_AS4, NOTE_DS5, NOTE_F5,
-            NOTE_FS5, NOTE_F5, NOTE_DS5, NOTE_CS5, NOTE_AS4, NOTE_GS4, NOTE_AS4,
-            NOTE_GS4, NOTE_FS4, NOTE_F4, NOTE_CS4, NOTE_DS4, NOTE_B4, NOTE_D5,
-            
-            # Verse(2) 33 - 48 转调到G大调
-            NOTE_D5, NOTE_E5, NOTE_B4, NOTE_A4, NOTE_B4, NOTE_A4, NOTE_B4,
-            NOTE_D5, NOTE_E5, NOTE_B4, NOTE_A4, NOTE_B4, NOTE_A4, NOTE_B4,
-            NOTE_A4, NOTE_G4, NOTE_FS4, NOTE_D4, NOTE_E4, NOTE_D4, NOTE_E4,
-            NOTE_FS4, NOTE_G4, NOTE_A4, NOTE_B4, NOTE_E4, NOTE_B4, NOTE_D5,
-            NOTE_D5, NOTE_E5, NOTE_B4, NOTE_A4, NOTE_B4, NOTE_A4, NOTE_B4,
-            NOTE_D5, NOTE_E5, NOTE_B4, NOTE_A4, NOTE_B4, NOTE_A4, NOTE_B4,
-            NOTE_A4, NOTE_G4, NOTE_FS4, NOTE_D4, NOTE_E4, NOTE_D4, NOTE_E4,
-            NOTE_FS4, NOTE_G4, NOTE_A4, NOTE_B4, NOTE_E4, NOTE_B4, NOTE_D5,
-            NOTE_D5, NOTE_E5, NOTE_B4, NOTE_A4, NOTE_B4, NOTE_A4, NOTE_B4,
-            NOTE_D5, NOTE_E5, NOTE_B4, NOTE_A4, NOTE_B4, NOTE_A4, NOTE_B4,
-            NOTE_A4, NOTE_G4, NOTE_FS4, NOTE_D4, NOTE_E4, NOTE_D4, NOTE_E4,
-            NOTE_FS4, NOTE_G4, NOTE_A4, NOTE_B4, NOTE_E4, NOTE_B4, NOTE_D5,
-            NOTE_D5, NOTE_E5, NOTE_B4, NOTE_A4, NOTE_B4, NOTE_A4, NOTE_B4,
-            NOTE_D5, NOTE_E5, NOTE_B4, NOTE_A4, NOTE_B4, NOTE_E5, NOTE_FS5,
-            NOTE_G5, NOTE_FS5, NOTE_E5, NOTE_D5, NOTE_B4, NOTE_A4, NOTE_B4,
-            NOTE_A4, NOTE_G4, NOTE_FS4, NOTE_D4, NOTE_E4, 0,
-            
-            # Outro
-            NOTE_E4, NOTE_E4, NOTE_E4, NOTE_E4, NOTE_E4, NOTE_E4,
-            NOTE_E4, NOTE_E4, NOTE_E4, NOTE_E4, NOTE_E4, NOTE_E4,
-            NOTE_E4, NOTE_E4, NOTE_E4, NOTE_E4, NOTE_E4, NOTE_E4,
-            NOTE_E4, NOTE_E4, NOTE_E4, NOTE_E4, NOTE_E4, 0,
-            0
-        ]
-        
-        # 音符时长数据：单位为1/16音符，时间 = 数字 * (1/16)
-        note_durations = [
-            # # Intro
-            4, 4, 4, 1, 1, 1, 1,
-            4, 4, 4, 2, 2,
-            4, 4, 4, 1, 1, 1, 1,
-            4, 4, 4, 2, 2,
-            4, 4, 4, 1, 1, 1, 1,
-            4, 4, 4, 2, 2,
-            4, 4, 4, 1, 1, 1, 1,
-            4, 4, 4, 2, 2,
-            4, 1, 1, 1, 1, 4, 1, 1, 1, 1,
-            4, 1, 1, 1, 1, 2, 1, 1, 2, 1, 1,
-            4, 1, 1, 1, 1, 4, 1, 1, 1, 1,
-            4, 1, 1, 1, 1, 2, 1, 1, 2, 1, 1,
-            4, 1, 1, 1, 1, 4, 1, 1, 1, 1,
-            4, 1, 1, 1, 1, 2, 1, 1, 2, 1, 1,
-            4, 1, 1, 1, 1, 4, 1, 1, 1, 1,
-            4, 1, 1, 1, 1, 2, 1, 1, 2, 1, 1,
-            
-            # Verse 1 - 16
-            2, 2, 2, 2, 4, 2, 2,
-            4, 4, 2, 2, 2, 2,
-            2, 2, 2, 2, 4, 2, 2,
-            2, 2, 2, 2, 2, 2, 2, 2,
-            2, 2, 2, 2, 4, 2, 2,
-            4, 4, 2, 2, 2, 2,
-            2, 2, 2, 2, 4, 2, 2,
-            4, 4, 4, 4,
-            2, 2, 2, 2, 4, 2, 2,
-            4, 4, 2, 2, 2, 2,
-            2, 2, 2, 2, 4, 2, 2,
-            2, 2, 2, 2, 2, 2, 2, 2,
-            2, 2, 2, 2, 4, 2, 2,
-            4, 4, 2, 2, 2, 2,
-            2, 2, 2, 2, 4, 2, 2,
-            4, 4, 4, 4,
-            
-            # Verse 17 - 32
-            2, 2, 2, 2, 4, 2, 2,
-            2, 2, 2, 2, 4, 2, 2,
-            2, 2, 2, 2, 4, 2, 2,
-            2, 2, 2, 2, 4, 2, 2,
-            2, 2, 2, 2, 4, 2, 2,
-            2, 2, 2, 2, 4, 2, 2,
-            2, 2, 2, 2, 4, 2, 2,
-            2, 2, 2, 2, 4, 2, 2,
-            2, 2, 2, 2, 4, 2, 2,
-            2, 2, 2, 2, 4, 2, 2,
-            2, 2, 2, 2, 4, 2, 2,
-            2, 2, 2, 2, 4, 2, 2,
-            2, 2, 2, 2, 4, 2, 2,
-            2, 2, 2, 2, 4, 2, 2,
-            2, 2, 2, 2, 4, 2, 2,
-            2, 2, 2, 2, 4, 2, 2,
-            
-            # Verse 33 - 48
-            2, 2, 2, 2, 4, 2, 2,
-            2, 2, 2, 2, 4, 2, 2,
-            2, 2, 2, 2, 4, 2, 2,
-            2, 2, 2, 2, 4, 2, 2,
-            2, 2, 2, 2, 4, 2, 2,
-            2, 2, 2, 2, 4, 2, 2,
-            2, 2, 2, 2, 4, 2, 2,
-            2, 2, 2, 2, 4, 2, 2,
-            2, 2, 2, 2, 4, 2, 2,
-            2, 2, 2, 2, 4, 2, 2,
-            2, 2, 2, 2, 4, 2, 2,
-            2, 2, 2, 2, 4, 2, 2,
-            2, 2, 2, 2, 4, 2, 2,
-            2, 2, 2, 2, 4, 2, 2,
-            2, 2, 2, 2, 4, 2, 2,
-            2, 2, 2, 2, 4, 4,
-            
-            # Interlude
-            4, 1, 1, 1, 1, 4, 1, 1, 1, 1,
-            4, 1, 1, 1, 1, 2, 1, 1, 2, 1, 1,
-            4, 1, 1, 1, 1, 4, 1, 1, 1, 1,
-            4, 1, 1, 1, 1, 2, 1, 1, 2, 1, 1,
-            4, 1, 1, 1, 1, 4, 1, 1, 1, 1,
-            4, 1, 1, 1, 1, 2, 1, 1, 2, 1, 1,
-            4, 1, 1, 1, 1, 4, 1, 1, 1, 1,
-            4, 1, 1, 1, 1, 2, 1, 1, 2, 1, 1,
-            
-            # Verse(2) 1 - 16
-            2, 2, 2, 2, 4, 2, 2,
-            4, 4, 2, 2, 2, 2,
-            2, 2, 2, 2, 4, 2, 2,
-            2, 2, 2, 2, 2, 2, 2, 2,
-            2, 2, 2, 2, 4, 2, 2,
-            4, 4, 2, 2, 2, 2,
-            2, 2, 2, 2, 4, 2, 2,
-            4, 4, 4, 4,
-            2, 2, 2, 2, 4, 2, 2,
-            4, 4, 2, 2, 2, 2,
-            2, 2, 2, 2, 4, 2, 2,
-            2, 2, 2, 2, 2, 2, 2, 2,
-            2, 2, 2, 2, 4, 2, 2,
-            4, 4, 2, 2, 2, 2,
-            2, 2, 2, 2, 4, 2, 2,
-            4, 4, 4, 4,
-            
-            # Verse(2) 17 - 32
-            2, 2, 2, 2, 4, 2, 2,
-            2, 2, 2, 2, 4, 2, 2,
-            2, 2, 2, 2, 4, 2, 2,
-            2, 2, 2, 2, 4, 2, 2,
-            2, 2, 2, 2, 4, 2, 2,
-            2, 2, 2, 2, 4, 2, 2,
-            2, 2, 2, 2, 4, 2, 2,
-            2, 2, 2, 2, 4, 2, 2,
-            2, 2, 2, 2, 4, 2, 2,
-            2, 2, 2, 2, 4, 2, 2,
-            2, 2, 2, 2, 4, 2, 2,
-            2, 2, 2, 2, 4, 2, 2,
-            2, 2, 2, 2, 4, 2, 2,
-            2, 2, 2, 2, 4, 2, 2,
-            2, 2, 2, 2, 4, 2, 2,
-            2, 2, 2, 2, 4, 2, 2,
-            
-            # Verse(2) 33 - 48
-            2, 2, 2, 2, 4, 2, 2,
-            2, 2, 2, 2, 4, 2, 2,
-            2, 2, 2, 2, 4, 2, 2,
-            2, 2, 2, 2, 4, 2, 2,
-            2, 2, 2, 2, 4, 2, 2,
-            2, 2, 2, 2, 4, 2, 2,
-            2, 2, 2, 2, 4, 2, 2,
-            2, 2, 2, 2, 4, 2, 2,
-            2, 2, 2, 2, 4, 2, 2,
-            2, 2, 2, 2, 4, 2, 2,
-            2, 2, 2, 2, 4, 2, 2,
-            2, 2, 2, 2, 4, 2, 2,
-            2, 2, 2, 2, 4, 2, 2,
-            2, 2, 2, 2, 4, 2, 2,
-            2, 2, 2, 2, 4, 2, 2,
-            2, 2, 2, 2, 4, 4,
-            
-            # Outro
-            3, 3, 2, 3, 3, 2,
-            3, 3, 2, 3, 3, 2,
-            3, 3, 2, 3, 3, 2,
-            3, 3, 2, 3, 3, 2,
-            16
-        ]
-        
-        total_notes = len(melody)
+        total_notes = len(MELODY)
         print(f"总共 {total_notes} 个音符")
         
+        # 播放循环放到专用线程，打印和信号处理不占用发声线程的时间
+        self._progress = 0
+        self._play_thread = threading.Thread(target=self._play_worker, daemon=True)
+        self._play_thread.start()
+        
         start_time = time.time()
+        last_report = start_time
+        try:
+            # 分段等待，保证主线程仍能及时响应Ctrl+C，并低频显示进度
+            while self._play_thread.is_alive():
+                self._play_thread.join(timeout=0.5)
+                now = time.time()
+                if now - last_report >= PROGRESS_INTERVAL and self._play_thread.is_alive():
+                    last_report = now
+                    played = self._progress
+                    progress = played / total_notes * 100
+                    print(f"播放进度: {progress:.1f}% ({played}/{total_notes}) - 已播放 {now - start_time:.1f}秒")
+        except KeyboardInterrupt:
+            print("\n播放被用户中断")
+            self.stop()
+            self._play_thread.join(timeout=1.0)
         
-        for i in range(total_notes):
+        if not self.stop_playing:
+            print("Bad Apple旋律播放完成！")
+    
+    def _play_worker(self):
+        """播放线程：依次输出每个音符，只更新进度计数，不做打印"""
+        for i in range(len(MELODY)):
             if self.stop_playing:  # 检查停止标志
                 print("\n音乐播放被停止")
                 break
                 
             try:
-                # 计算音符持续时间
-                note_duration = ndms * note_durations[i] / bpm
-                
-                # 播放音符
-                self.tone(melody[i], note_duration)
+                # 播放音符（时长已预先计算），休止符无需发声
+                frequency = MELODY[i]
+                if frequency:
+                    self.tone(frequency, NOTE_DURATIONS_MS[i])
                 
                 # 音符间的停顿
-                pause_between_notes = note_duration / 4
-                time.sleep(pause_between_notes / 1000.0)
+                self._stop_event.wait(NOTE_RELEASE_S[i])
                 
-                # 显示进度
-                if i % 50 == 0:
-                    elapsed = time.time() - start_time
-                    progress = (i + 1) / total_notes * 100
-                    print(f"播放进度: {progress:.1f}% ({i+1}/{total_notes}) - 已播放 {elapsed:.1f}秒")
+                self._progress = i + 1
                     
-            except KeyboardInterrupt:
-                print("\n播放被用户中断")
-                break
             except Exception as e:
                 print(f"播放音符 {i} 时出错: {e}")
                 continue
-        
-        if not self.stop_playing:
-            print("Bad Apple旋律播放完成！")
     
     def stop(self):
         """停止播放"""
         self.stop_playing = True
+        self._stop_event.set()
+        if self.pi is not None:
+            self.pi.wave_tx_stop()  # 立即静音，不等待当前音符结束
+        if self.pwm is not None:
+            self.pwm.stop()  # 立即静音，不等待当前音符结束
     
     def cleanup_and_exit(self, signum, frame):
         """清理GPIO并退出"""
         print("\n\n正在清理GPIO...")
+        self.stop_playing = True
+        self._stop_event.set()
+        if self._play_thread is not None:
+            self._play_thread.join(timeout=0.1)
         self.cleanup()
         print("GPIO清理完成，程序退出")
         sys.exit(0)
@@ -587,10 +573,22 @@ class BadAppleBuzzer:
     def cleanup(self):
         """手动清理GPIO"""
         self.stop_playing = True
+        self._stop_event.set()
         if self.gpio_initialized:
             try:
                 # 确保蜂鸣器关闭
-                self._gpio_output(self.beep_pin, GPIO.LOW)
+                if self.pi is not None:
+                    self.pi.wave_tx_stop()
+                    self.pi.wave_clear()
+                    self.pi.write(self.beep_pin_bcm, 0)
+                    self.pi.stop()
+                    self.pi = None
+                    self._waves = {}
+                if self.pwm is not None:
+                    self.pwm.stop()
+                    self.pwm = None  # 释放PWM对象，以便同一引脚可重新创建
+                self._gpio_regs = None
+                self._out(self.beep_pin, GPIO.LOW)
                 
                 if GPIO_MANAGER_AVAILABLE:
                     # 使用GPIO管理器释放引脚
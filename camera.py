@@ -1,23 +1,170 @@
 import time
 import os
+import pathlib
 import cv2
 import threading
 import signal
 import sys
+import queue
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
 
+# Numba可用时编译人脸框处理函数（可选）
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+def _scale_and_clip_boxes(faces, scale, width, height):
+    """
+    将检测得到的人脸框放大scale倍并裁剪到画面范围内
+    :param faces: (N, 4)的人脸框数组 (x, y, w, h)
+    :return: (N, 4)的int32数组
+    """
+    boxes = faces.astype(np.int32) * scale
+    x0 = np.clip(boxes[:, 0], 0, width)
+    y0 = np.clip(boxes[:, 1], 0, height)
+    x1 = np.clip(boxes[:, 0] + boxes[:, 2], 0, width)
+    y1 = np.clip(boxes[:, 1] + boxes[:, 3], 0, height)
+    return np.stack((x0, y0, x1 - x0, y1 - y0), axis=1)
+
+def _draw_boxes(frame, boxes):
+    """
+    直接写像素绘制人脸框（蓝色，线宽2），效果与cv2.rectangle相同
+    :param frame: BGR图像，原地修改
+    :param boxes: (N, 4)的int32人脸框数组 (x, y, w, h)
+    """
+    height, width = frame.shape[0], frame.shape[1]
+    color = (255, 0, 0)
+    for i in range(boxes.shape[0]):
+        x0 = max(boxes[i, 0] - 1, 0)
+        y0 = max(boxes[i, 1] - 1, 0)
+        x1 = min(boxes[i, 0] + boxes[i, 2] + 1, width)
+        y1 = min(boxes[i, 1] + boxes[i, 3] + 1, height)
+        if x0 >= x1 or y0 >= y1:
+            continue
+        for c in range(3):
+            value = color[c]
+            frame[y0:min(y0 + 2, y1), x0:x1, c] = value
+            frame[max(y1 - 2, y0):y1, x0:x1, c] = value
+            frame[y0:y1, x0:min(x0 + 2, x1), c] = value
+            frame[y0:y1, max(x1 - 2, x0):x1, c] = value
+    return frame
+
+def _filter_boxes(xs, ys, ws, hs, areas, min_area=1000.0):
+    """
+    按面积和长宽比筛选肤色区域的外接矩形
+    :param xs, ys, ws, hs: 外接矩形的坐标和宽高数组
+    :param areas: 轮廓面积数组
+    :param min_area: 最小面积阈值
+    :return: (N, 4)的int32数组 (x, y, w, h)
+    """
+    out = np.empty((xs.shape[0], 4), np.int32)
+    n = 0
+    for i in range(xs.shape[0]):
+        if areas[i] <= min_area or ws[i] <= 0:
+            continue
+        ratio = hs[i] / ws[i]
+        if 0.7 < ratio < 1.5:  # 人脸大致是椭圆形
+            out[n, 0] = xs[i]
+            out[n, 1] = ys[i]
+            out[n, 2] = ws[i]
+            out[n, 3] = hs[i]
+            n += 1
+    return out[:n]
+
+if NUMBA_AVAILABLE:
+    # cache=True把编译结果保存到磁盘，之后启动时直接加载，没有JIT冷启动；
+    # nogil=True在执行期间释放GIL，检测线程和写入线程中的调用可以真正并行
+    _scale_and_clip_boxes = njit(cache=True, nogil=True)(_scale_and_clip_boxes)
+    _draw_boxes = njit(cache=True, nogil=True)(_draw_boxes)
+    _filter_boxes = njit(cache=True, nogil=True)(_filter_boxes)
+
+# 并行人脸检测的线程数，同时也是最多未完成的检测任务数
+DETECT_WORKERS = 2
+
+# 录像流水线中采集线程与写入线程之间的缓冲帧数。
+# 写满说明编码跟不上，此时丢弃新帧并计数，采集线程不被编码I/O阻塞
+PIPELINE_PREFETCH = 8
+
+# 性能统计的指数滑动平均系数，以及每处理多少帧重新计算一次检测间隔
+METRICS_ALPHA = 0.1
+TUNE_EVERY = 64
+
+# 场景变化判断：缩略图尺寸和平均灰度差阈值，低于阈值时跳过检测，沿用上次结果
+MOTION_THUMB_SIZE = (80, 60)
+MOTION_THRESHOLD = 3.0
+
+# 启用OpenCV的SIMD优化实现（SSE/AVX/NEON，通常默认开启，这里显式确认）。
+# 采集、检测、写入已分别在独立线程中进行，OpenCV内部再开线程池只会与之争抢CPU，
+# 因此每次调用单线程执行
+cv2.setUseOptimized(True)
+cv2.setNumThreads(1)
+
 class USBCamera:
+    # 硬件/H.264编码器都不可用时使用的软件编码格式，可在子类或实例上覆盖
+    fourcc = 'mp4v'
+    
     def __init__(self, camera_index=0):
         """初始化USB摄像头"""
         self.camera_index = camera_index
+        # 照片和录像保存在当前目录下的camera文件夹，创建一次后复用
+        self.out_dir = pathlib.Path(os.getcwd()) / "camera"
+        self.out_dir.mkdir(parents=True, exist_ok=True)
         self.cap = None
         self.recording = False
         self.face_cascade = None
+        self.face_detector = None  # YuNet检测器
+        self._detector_path = None  # 检测器模型/级联文件路径，用于创建线程副本
+        self._local = threading.local()  # 每个检测线程各自的检测器副本
         self.dnn_net = None
         self.stop_recording = False
         self.headless_mode = self.is_headless()
+        # 只有显示窗口时才检查按键；waitKey每次至少休眠1ms，无头模式完全跳过，
+        # 退出只依靠中断信号设置的停止事件
+        self._poll_keys = not self.headless_mode
         self.camera_available = False
-        self.face_detection_method = None  # 'cascade' 或 'dnn' 或 None
+        self.face_detection_method = None  # 'yunet'、'cascade'、'simple' 或 None
+        # 采集线程相关：采集线程独占self.cap，最新的帧放入环形缓冲区
+        self._frame_q = deque(maxlen=2)  # (帧序号, 帧)，只保留最新的帧
+        self._frame_ready = threading.Event()  # 有新帧时置位
+        self._stop_event = threading.Event()  # 通知采集/写入线程退出
+        self._grab_thread = None
+        self._grab_failed = False
+        self._write_q = None  # 录像时的写入队列，用于统计队列深度
+        # 性能统计：检测耗时和采集间隔的滑动平均(毫秒)，以及因写入队列已满丢弃的帧数
+        self._metrics = {'det_ewma_ms': 0.0, 'cap_ewma_ms': 0.0, 'drops': 0}
+        self._detection_interval = 5  # 当前的检测间隔(帧)，根据统计自动调整
+        # 场景变化判断用的缩略图缓冲区：上一关键帧和当前帧的灰度缩略图
+        thumb_w, thumb_h = MOTION_THUMB_SIZE
+        self._small_bgr = np.empty((thumb_h, thumb_w, 3), np.uint8)
+        self._small_prev = np.empty((thumb_h, thumb_w), np.uint8)
+        self._small_cur = np.empty_like(self._small_prev)
+        self._small_valid = False  # _small_prev中是否已有关键帧
+        self._last_faces = ()  # 最近一次检测结果，写入线程用于绘制人脸框
+        self._detect_shape = None  # 上次检测的帧尺寸
+        self._scale = 1  # 检测前的缩小倍数
+        self._det_pool = None  # 人脸检测线程池
+        # 两次检测之间使用MOSSE相关滤波跟踪器（opencv-contrib的legacy模块）
+        self._trackers = None
+        self._tracker_create = None
+        if hasattr(cv2, 'legacy') and hasattr(cv2.legacy, 'TrackerMOSSE_create'):
+            self._tracker_create = cv2.legacy.TrackerMOSSE_create
+        # 简化检测的肤色范围(YCrCb: Cr 133~173, Cb 77~127)和去噪结构元素，只创建一次
+        self._skin_lo = np.array([0, 133, 77], dtype=np.uint8)
+        self._skin_hi = np.array([255, 173, 127], dtype=np.uint8)
+        self._skin_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (3, 3))
+        # 有OpenCL设备时简化检测走UMat路径；级联检测的OpenCL实现有已知问题，仍在CPU上运行
+        self._use_opencl = False
+        try:
+            if cv2.ocl.haveOpenCL():
+                cv2.ocl.setUseOpenCL(True)
+                self._use_opencl = cv2.ocl.useOpenCL()
+        except Exception:
+            self._use_opencl = False
+        self._gstreamer = None  # OpenCV是否支持GStreamer，首次录像时检查
         self.setup_camera()
         self.setup_face_detection()
     
@@ -42,6 +189,15 @@ class USBCamera:
                     self.cap = cv2.VideoCapture(self.camera_index, backend)
                     
                     if self.cap.isOpened():
+                        # 驱动缓冲区只保留1帧，处理变慢时读到的仍是最新画面，而不是积压的旧帧
+                        try:
+                            if self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1):
+                                print("摄像头缓冲区已设置为1帧")
+                            else:
+                                print(f"后端 {backend} 不支持设置缓冲区大小")
+                        except Exception as e:
+                            print(f"设置摄像头缓冲区失败: {e}")
+                        
                         # 测试是否能读取画面
                         ret, frame = self.cap.read()
                         if ret and frame is not None:
@@ -64,6 +220,9 @@ class USBCamera:
             
             # 尝试设置摄像头参数（如果失败则使用默认值）
             try:
+                # 请求未压缩的YUYV格式，省去CPU上的MJPEG解码；
+                # 仍由OpenCV转换为BGR（录像和显示需要），检测时再转灰度
+                self.cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*'YUYV'))
                 self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
                 self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
                 self.cap.set(cv2.CAP_PROP_FPS, 15)
@@ -81,20 +240,52 @@ class USBCamera:
         """初始化人脸检测器"""
         print("正在初始化人脸检测器...")
         
-        # 方法1: 尝试使用OpenCV内置的Haar级联分类器
+        # 检测线程池：检测在后台进行，采集和显示不被阻塞。
+        # OpenCV在detectMultiScale内部释放GIL，多个检测可以真正并行
+        self._det_pool = ThreadPoolExecutor(max_workers=DETECT_WORKERS)
+        
+        if NUMBA_AVAILABLE:
+            # 预先触发一次编译，避免首次检测时卡顿
+            _scale_and_clip_boxes(np.zeros((1, 4), np.int32), 1, 1, 1)
+            _draw_boxes(np.zeros((4, 4, 3), np.uint8), np.ones((1, 4), np.int32))
+            rects = np.ones((1, 4), np.int32)  # 与检测时一样传入列切片，编译同一签名
+            _filter_boxes(rects[:, 0], rects[:, 1], rects[:, 2], rects[:, 3], np.zeros(1))
+        
+        # 方法1: 优先使用YuNet DNN检测器（OpenCV 4.5.4+，需要模型文件）
+        try:
+            model_path = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                      "face_detection_yunet_2023mar.onnx")
+            if hasattr(cv2, 'FaceDetectorYN_create') and os.path.exists(model_path):
+                self.face_detector = self._create_yunet(model_path)
+                self._detector_path = model_path
+                self._local.detector = self.face_detector
+                self.face_detection_method = 'yunet'
+                print(f"人脸检测器已初始化 (YuNet): {model_path}")
+                return
+        except Exception as e:
+            print(f"YuNet检测器初始化失败: {e}")
+        
+        # 方法2: 尝试使用OpenCV级联分类器，LBP比Haar快数倍
         try:
             if hasattr(cv2, 'data') and hasattr(cv2.data, 'haarcascades'):
-                cascade_path = cv2.data.haarcascades + 'haarcascade_frontalface_default.xml'
-                if os.path.exists(cascade_path):
-                    self.face_cascade = cv2.CascadeClassifier(cascade_path)
-                    if not self.face_cascade.empty():
-                        self.face_detection_method = 'cascade'
-                        print(f"人脸检测器已初始化 (Haar级联): {cascade_path}")
-                        return
+                cascade_paths = [
+                    ("LBP级联", os.path.join(os.path.dirname(os.path.normpath(cv2.data.haarcascades)),
+                                          'lbpcascades', 'lbpcascade_frontalface_improved.xml')),
+                    ("Haar级联", cv2.data.haarcascades + 'haarcascade_frontalface_default.xml'),
+                ]
+                for name, cascade_path in cascade_paths:
+                    if os.path.exists(cascade_path):
+                        self.face_cascade = cv2.CascadeClassifier(cascade_path)
+                        if not self.face_cascade.empty():
+                            self._detector_path = cascade_path
+                            self._local.detector = self.face_cascade
+                            self.face_detection_method = 'cascade'
+                            print(f"人脸检测器已初始化 ({name}): {cascade_path}")
+                            return
         except Exception as e:
-            print(f"Haar级联检测器初始化失败: {e}")
+            print(f"级联检测器初始化失败: {e}")
         
-        # 方法2: 尝试使用OpenCV DNN人脸检测
+        # 方法3: 尝试使用OpenCV DNN人脸检测
         try:
             # 创建一个简单的基于颜色的人脸检测器作为备选
             print("尝试使用DNN人脸检测...")
@@ -107,29 +298,115 @@ class USBCamera:
         except Exception as e:
             print(f"DNN人脸检测器初始化失败: {e}")
         
-        # 方法3: 最后备选 - 不使用人脸检测
+        # 方法4: 最后备选 - 不使用人脸检测
         print("警告: 无法初始化任何人脸检测器，人脸检测功能将被禁用")
         self.face_detection_method = None
     
     def detect_faces(self, frame):
-        """检测人脸"""
-        if self.face_detection_method == 'cascade' and self.face_cascade is not None:
+        """
+        检测人脸
+        :param frame: BGR图像
+        """
+        if self.face_detection_method == 'yunet' and self.face_detector is not None:
+            return self._detect_faces_yunet(frame)
+        elif self.face_detection_method == 'cascade' and self.face_cascade is not None:
             return self._detect_faces_cascade(frame)
         elif self.face_detection_method == 'simple':
             return self._detect_faces_simple(frame)
         else:
             return []
     
+    def _detect_scale(self, shape):
+        """
+        计算检测前的整数缩小倍数，使图像不小于320x240，按帧尺寸缓存
+        :param shape: 帧的shape
+        """
+        if self._detect_shape != shape[:2]:
+            h, w = shape[:2]
+            self._detect_shape = shape[:2]
+            self._scale = max(1, min(w // 320, h // 240))
+        return self._scale
+    
+    def _create_yunet(self, model_path):
+        """
+        创建YuNet检测器：输入尺寸与摄像头一致，置信度阈值0.7，NMS阈值0.3，
+        使用OpenCV自带的CPU推理后端
+        """
+        return cv2.FaceDetectorYN_create(model_path, "", (640, 480), 0.7, 0.3, 5000,
+                                         cv2.dnn.DNN_BACKEND_OPENCV, cv2.dnn.DNN_TARGET_CPU)
+    
+    def _thread_detector(self):
+        """
+        获取当前线程专用的检测器副本，首次使用时创建。
+        多个线程共用一个级联分类器会争用其内部的缩放/积分图缓冲区，
+        YuNet的网络也不能被并发调用
+        """
+        local = self._local
+        detector = getattr(local, 'detector', None)
+        if detector is None:
+            if self.face_detection_method == 'yunet':
+                detector = self._create_yunet(self._detector_path)
+            else:
+                detector = cv2.CascadeClassifier(self._detector_path)
+            local.detector = detector
+        return detector
+    
+    def _detect_faces_yunet(self, frame):
+        """使用YuNet检测人脸，直接输入BGR图像，无需转换灰度"""
+        try:
+            detector = self._thread_detector()
+            h, w = frame.shape[:2]
+            if getattr(self._local, 'input_size', None) != (w, h):
+                detector.setInputSize((w, h))
+                self._local.input_size = (w, h)
+            _, faces = detector.detect(frame)
+            if faces is None:
+                return []
+            # YuNet的框可能超出画面边界
+            return _scale_and_clip_boxes(faces[:, :4], 1, w, h)
+        except Exception as e:
+            print(f"YuNet人脸检测出错: {e}")
+            return []
+    
+    def _to_gray(self, frame):
+        """转换为灰度图：单通道直接返回，BGR转换到复用的缓冲区"""
+        if frame.ndim == 2:
+            return frame
+        gray = self._thread_buffer('gray', frame.shape[:2])
+        return cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY, dst=gray)
+    
+    def _thread_buffer(self, name, shape):
+        """
+        获取当前线程复用的uint8缓冲区，尺寸变化时重新分配，
+        避免每帧分配新数组带来的内存分配和缺页开销
+        """
+        buf = getattr(self._local, name, None)
+        if buf is None or buf.shape != shape:
+            buf = np.empty(shape, np.uint8)
+            setattr(self._local, name, buf)
+        return buf
+    
     def _detect_faces_cascade(self, frame):
         """使用Haar级联检测人脸"""
         try:
-            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-            faces = self.face_cascade.detectMultiScale(
+            gray = self._to_gray(frame)
+            # 级联检测的扫描窗口数随分辨率平方增长，先缩小再检测
+            scale = self._detect_scale(frame.shape)
+            if scale > 1:
+                h, w = gray.shape
+                small = self._thread_buffer('gray_small', (h // scale, w // scale))
+                gray = cv2.resize(gray, (w // scale, h // scale), dst=small,
+                                  interpolation=cv2.INTER_AREA)
+            faces = self._thread_detector().detectMultiScale(
                 gray,
                 scaleFactor=1.1,
                 minNeighbors=5,
-                minSize=(30, 30)
+                minSize=(max(1, 30 // scale), max(1, 30 // scale)),
+                maxSize=(300 // scale, 300 // scale)  # 限制金字塔层数
             )
+            if scale > 1 and len(faces) > 0:
+                h, w = frame.shape[:2]
+                faces = _scale_and_clip_boxes(faces, scale, w, h)  # 映射回原图坐标
             return faces
         except Exception as e:
             print(f"Haar级联人脸检测出错: {e}")
@@ -138,39 +415,274 @@ class USBCamera:
     def _detect_faces_simple(self, frame):
         """简化的人脸检测方法 - 基于肤色检测"""
         try:
-            # 转换为HSV颜色空间
-            hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
-            
-            # 定义肤色范围 (这是一个简化的方法)
-            lower_skin = np.array([0, 20, 70], dtype=np.uint8)
-            upper_skin = np.array([20, 255, 255], dtype=np.uint8)
-            
-            # 创建肤色掩码
-            mask = cv2.inRange(hsv, lower_skin, upper_skin)
-            
-            # 形态学操作去噪
-            kernel = np.ones((3, 3), np.uint8)
-            mask = cv2.morphologyEx(mask, cv2.MORPH_OPEN, kernel)
-            mask = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, kernel)
+            if self._use_opencl:
+                mask = self._skin_mask_opencl(frame)
+            else:
+                # 转换为YCrCb颜色空间（线性变换，没有HSV的除法），结果和掩码都写入复用的缓冲区
+                ycrcb = cv2.cvtColor(frame, cv2.COLOR_BGR2YCrCb, dst=self._thread_buffer('ycrcb', frame.shape))
+                
+                # 创建肤色掩码（肤色范围和结构元素在初始化时创建）
+                mask = cv2.inRange(ycrcb, self._skin_lo, self._skin_hi,
+                                   dst=self._thread_buffer('mask', frame.shape[:2]))
+                
+                # 形态学操作去噪，原地进行
+                cv2.morphologyEx(mask, cv2.MORPH_OPEN, self._skin_kernel, dst=mask)
+                cv2.morphologyEx(mask, cv2.MORPH_CLOSE, self._skin_kernel, dst=mask)
             
             # 查找轮廓
             contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
             
-            faces = []
-            for contour in contours:
-                area = cv2.contourArea(contour)
-                if area > 1000:  # 最小面积阈值
-                    x, y, w, h = cv2.boundingRect(contour)
-                    # 简单的长宽比检查
-                    if 0.7 < h/w < 1.5:  # 人脸大致是椭圆形
-                        faces.append([x, y, w, h])
+            if not contours:
+                return np.array([])
             
-            return np.array(faces) if faces else np.array([])
+            # 一次性取出外接矩形和面积，面积和长宽比筛选交给（可JIT编译的）_filter_boxes
+            rects = np.array([cv2.boundingRect(c) for c in contours], dtype=np.int32)
+            areas = np.array([cv2.contourArea(c) for c in contours], dtype=np.float64)
+            faces = _filter_boxes(rects[:, 0], rects[:, 1], rects[:, 2], rects[:, 3], areas)
+            
+            return faces if len(faces) > 0 else np.array([])
             
         except Exception as e:
             print(f"简化人脸检测出错: {e}")
             return []
     
+    def _skin_mask_opencl(self, frame):
+        """
+        在OpenCL设备上计算肤色掩码：颜色转换、阈值和形态学都由UMat分派到OpenCL内核，
+        只有结果掩码取回内存用于查找轮廓
+        """
+        umat = cv2.UMat(frame)
+        ycrcb = cv2.cvtColor(umat, cv2.COLOR_BGR2YCrCb)
+        mask = cv2.inRange(ycrcb, self._skin_lo, self._skin_hi)
+        mask = cv2.morphologyEx(mask, cv2.MORPH_OPEN, self._skin_kernel)
+        mask = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, self._skin_kernel)
+        return mask.get()
+    
+    def _start_grabber(self, write_q=None, retrieve_every=1):
+        """
+        启动采集线程。VideoCapture不是线程安全的，会话期间只有采集线程访问self.cap
+        :param write_q: 录像时的写入队列，每一帧都会放入（队列满时丢弃）；None表示不录像
+        :param retrieve_every: 每隔几帧解码一次，其余帧只grab不解码（录像时必须为1）；
+                               None表示跟随当前的检测间隔self._detection_interval
+        """
+        self._stop_event.clear()
+        self._frame_ready.clear()
+        self._frame_q.clear()
+        self._grab_failed = False
+        self._write_q = write_q
+        self._metrics['drops'] = 0
+        self._small_valid = False  # 新会话的第一帧总是检测
+        self._last_faces = ()
+        self._trackers = None
+        self._grab_thread = threading.Thread(target=self._grab_loop, args=(write_q, retrieve_every),
+                                             daemon=True)
+        self._grab_thread.start()
+    
+    def _grab_loop(self, write_q, retrieve_every):
+        """
+        采集线程：持续读取画面，不等待人脸检测。
+        帧序号按grab计数，只有需要的帧才retrieve（解码并复制）
+        """
+        seq = 0
+        next_retrieve = 1  # 下一个需要解码的帧序号
+        metrics = self._metrics
+        last_ns = time.perf_counter_ns()
+        while not self._stop_event.is_set():
+            if not self.cap.grab():
+                self._grab_failed = True
+                break
+            now_ns = time.perf_counter_ns()
+            metrics['cap_ewma_ms'] += METRICS_ALPHA * ((now_ns - last_ns) / 1e6 - metrics['cap_ewma_ms'])
+            last_ns = now_ns
+            seq += 1
+            if seq < next_retrieve:
+                continue
+            # 每次解码时重新读取间隔，检测间隔自动调整后立即生效
+            next_retrieve = seq + (retrieve_every or self._detection_interval)
+            ret, frame = self.cap.retrieve()
+            if not ret or frame is None:
+                self._grab_failed = True
+                break
+            self._frame_q.append((seq, frame))
+            self._frame_ready.set()
+            if write_q is not None:
+                try:
+                    write_q.put_nowait(frame)  # 只传递帧的引用，不复制
+                except queue.Full:
+                    metrics['drops'] += 1
+        self._frame_ready.set()  # 唤醒等待中的检测循环
+    
+    def _install_stop_handler(self, message):
+        """
+        会话期间让Ctrl+C只设置停止事件，由循环自行退出
+        :param message: 收到信号时打印的提示
+        :return: 原来的SIGINT处理器，会话结束后用_restore_handler恢复；
+                 不在主线程中无法安装时返回None
+        """
+        def signal_handler(sig, frame):
+            print(message)
+            self.stop_recording = True
+            self._stop_event.set()
+        
+        try:
+            return signal.signal(signal.SIGINT, signal_handler)
+        except ValueError:
+            # signal只能在主线程中设置，其他线程中由调用方通过停止事件结束会话
+            print("非主线程运行，Ctrl+C处理器未安装")
+            return None
+    
+    def _restore_handler(self, previous_handler):
+        """恢复会话开始前的SIGINT处理器，调用方的Ctrl+C处理不受影响"""
+        if previous_handler is not None:
+            signal.signal(signal.SIGINT, previous_handler)
+    
+    def _stop_grabber(self):
+        """停止采集线程并等待其退出"""
+        self._stop_event.set()
+        if self._grab_thread is not None:
+            self._grab_thread.join(timeout=2.0)
+            self._grab_thread = None
+    
+    def _next_frame(self, timeout=0.5):
+        """
+        等待并取出最新的一帧，中间未处理的旧帧直接丢弃
+        :return: (帧序号, 帧)，超时或采集结束时返回None
+        """
+        if not self._frame_ready.wait(timeout):
+            return None
+        self._frame_ready.clear()
+        try:
+            return self._frame_q[-1]
+        except IndexError:
+            return None
+    
+    def _reset_trackers(self, frame, faces):
+        """
+        用检测结果重新初始化MOSSE跟踪器（需要opencv-contrib，不可用时不跟踪）
+        :param frame: 检测结果对应的当前帧
+        :param faces: 人脸框列表
+        """
+        self._trackers = None
+        if self._tracker_create is None or len(faces) == 0:
+            return
+        try:
+            trackers = cv2.legacy.MultiTracker_create()
+            for (x, y, w, h) in faces:
+                trackers.add(self._tracker_create(), frame, (int(x), int(y), int(w), int(h)))
+            self._trackers = trackers
+        except Exception as e:
+            print(f"初始化人脸跟踪器失败: {e}")
+    
+    def _update_trackers(self, frame):
+        """
+        用跟踪器更新人脸框，代价远低于完整检测
+        :return: (是否成功, 人脸框数组)；没有跟踪目标时为(True, None)
+        """
+        if self._trackers is None:
+            return True, None
+        try:
+            ok, boxes = self._trackers.update(frame)
+        except Exception as e:
+            print(f"人脸跟踪出错: {e}")
+            ok = False
+        if not ok:
+            self._trackers = None
+            return False, None
+        return True, np.asarray(boxes).astype(np.int32)
+    
+    def _collect_detections(self, pending, wait=False):
+        """
+        按提交顺序取出已完成的检测结果
+        :param pending: 检测任务队列
+        :param wait: 为True时等待全部任务完成
+        :return: 人脸检测结果列表
+        """
+        results = []
+        while pending and (wait or pending[0].done()):
+            results.append(pending.popleft().result())
+        return results
+    
+    def _report_dropped(self):
+        """录像结束后报告因编码跟不上而丢弃的帧数"""
+        if self._metrics['drops']:
+            print(f"编码速度不足，丢弃了 {self._metrics['drops']} 帧")
+    
+    def _scene_changed(self, frame):
+        """
+        比较当前帧与上一关键帧的灰度缩略图，判断画面是否有变化。
+        有变化时当前帧成为新的关键帧
+        :param frame: BGR图像
+        :return: 平均灰度差超过阈值（或还没有关键帧）时返回True
+        """
+        cv2.resize(frame, MOTION_THUMB_SIZE, dst=self._small_bgr, interpolation=cv2.INTER_AREA)
+        cv2.cvtColor(self._small_bgr, cv2.COLOR_BGR2GRAY, dst=self._small_cur)
+        if self._small_valid:
+            score = cv2.mean(cv2.absdiff(self._small_cur, self._small_prev))[0]
+            if score < MOTION_THRESHOLD:
+                return False
+        # 交换缓冲区，当前缩略图成为关键帧
+        self._small_prev, self._small_cur = self._small_cur, self._small_prev
+        self._small_valid = True
+        return True
+    
+    def _timed_detect(self, frame):
+        """在检测线程中执行人脸检测，并更新检测耗时的滑动平均"""
+        start_ns = time.perf_counter_ns()
+        faces = self.detect_faces(frame)
+        elapsed_ms = (time.perf_counter_ns() - start_ns) / 1e6
+        self._metrics['det_ewma_ms'] += METRICS_ALPHA * (elapsed_ms - self._metrics['det_ewma_ms'])
+        return faces
+    
+    def _tune_detection_interval(self):
+        """
+        根据检测耗时和采集间隔调整检测间隔，使检测线程池的吞吐量与采集帧率匹配
+        :return: 新的检测间隔(帧)
+        """
+        det_ms = self._metrics['det_ewma_ms']
+        cap_ms = self._metrics['cap_ewma_ms']
+        if det_ms > 0 and cap_ms > 0:
+            # 多个检测线程并行，单次检测耗时按线程数分摊
+            self._detection_interval = max(1, int(round(det_ms / DETECT_WORKERS / cap_ms)))
+        return self._detection_interval
+    
+    def get_metrics(self):
+        """
+        获取流水线的性能统计
+        :return: 包含检测耗时、采集间隔、丢帧数、检测间隔和各队列深度的字典
+        """
+        status = dict(self._metrics)
+        status['detection_interval'] = self._detection_interval
+        status['frame_q'] = len(self._frame_q)
+        status['write_q'] = self._write_q.qsize() if self._write_q is not None else 0
+        return status
+    
+    def _print_metrics(self):
+        """打印性能统计"""
+        m = self.get_metrics()
+        print(f"检测耗时 {m['det_ewma_ms']:.1f}ms，采集间隔 {m['cap_ewma_ms']:.1f}ms，"
+              f"检测间隔 {m['detection_interval']} 帧，写入队列 {m['write_q']}，丢帧 {m['drops']}")
+    
+    def _write_loop(self, out, write_q):
+        """写入线程：按顺序编码所有帧，并绘制最近一次检测到的人脸框"""
+        faces = None
+        boxes = None
+        while True:
+            frame = write_q.get()
+            if frame is None:
+                break
+            if faces is not self._last_faces:
+                # 检测结果更新时才转换一次，之后每帧直接使用
+                faces = self._last_faces
+                boxes = np.asarray(faces, dtype=np.int32).reshape(-1, 4)
+            try:
+                if len(boxes) > 0:
+                    # 检测线程可能仍在读取该帧，在副本上绘制
+                    frame = _draw_boxes(frame.copy(), boxes)
+                out.write(frame)
+            except Exception as e:
+                # 单帧出错不退出，否则队列无人消费，结束时放入结束标记会一直阻塞
+                print(f"写入视频帧出错: {e}")
+    
     def capture_photo(self, filename=None):
         """拍照功能"""
         if not self.camera_available or self.cap is None:
@@ -178,14 +690,9 @@ class USBCamera:
             return None
             
         if filename is None:
-            filename = f"photo_{int(time.time())}.jpg"
+            filename = f"photo_{time.time_ns() // 1_000_000_000}.jpg"
         
-        # 使用当前目录下的camera文件夹
-        camera_dir = os.path.join(os.getcwd(), "camera")
-        if not os.path.exists(camera_dir):
-            os.makedirs(camera_dir)
-        
-        filepath = os.path.join(camera_dir, filename)
+        filepath = str(self.out_dir / filename)
         
         # 拍照
         try:
@@ -201,17 +708,74 @@ class USBCamera:
             print(f"拍照失败: {e}")
             return None
     
+    def _open_writer(self, filepath, fps, size):
+        """
+        创建视频写入器，优先使用硬件H.264编码，依次回退到软件编码
+        :param filepath: 输出文件路径
+        :param fps: 帧率
+        :param size: (宽, 高)
+        :return: cv2.VideoWriter
+        """
+        width, height = size
+        
+        # 方法1: GStreamer appsrc管道，帧直接推入管道，由queue元素与编码解耦
+        # 优先V4L2硬件编码器（树莓派/Jetson），其次x264软件编码
+        if self._gstreamer_available():
+            source = (
+                f"appsrc ! video/x-raw,format=BGR,width={width},height={height},"
+                f"framerate={max(fps, 1)}/1 ! queue max-size-buffers=4 leaky=downstream ! "
+                f"videoconvert ! "
+            )
+            sink = f" ! h264parse ! mp4mux ! filesink location={filepath}"
+            encoders = [
+                ("GStreamer硬件H.264", "v4l2h264enc"),
+                ("GStreamer x264", "x264enc tune=zerolatency speed-preset=ultrafast"),
+            ]
+            for name, encoder in encoders:
+                try:
+                    out = cv2.VideoWriter(source + encoder + sink, cv2.CAP_GSTREAMER, 0,
+                                          fps, (width, height))
+                    if out.isOpened():
+                        print(f"视频编码器: {name}")
+                        return out
+                    out.release()
+                except Exception as e:
+                    print(f"{name}编码器不可用: {e}")
+        
+        # 方法2: FFMPEG H.264（avc1），支持时可由硬件加速
+        try:
+            out = cv2.VideoWriter(filepath, cv2.CAP_FFMPEG, cv2.VideoWriter_fourcc(*'avc1'),
+                                  fps, (width, height))
+            if out.isOpened():
+                print("视频编码器: FFMPEG H.264")
+                return out
+            out.release()
+        except Exception as e:
+            print(f"FFMPEG H.264编码器不可用: {e}")
+        
+        # 方法3: 软件编码（默认MPEG-4）
+        print(f"视频编码器: {self.fourcc}")
+        fourcc = cv2.VideoWriter_fourcc(*self.fourcc)
+        return cv2.VideoWriter(filepath, fourcc, fps, (width, height))
+    
+    def _gstreamer_available(self):
+        """检查OpenCV是否编译了GStreamer支持，结果缓存"""
+        if self._gstreamer is None:
+            try:
+                info = cv2.getBuildInformation()
+                self._gstreamer = any(
+                    'GStreamer' in line and 'YES' in line for line in info.splitlines()
+                )
+            except Exception:
+                self._gstreamer = False
+        return self._gstreamer
+    
     def start_recording_with_face_detection(self, filename=None, duration=10, detection_interval=5):
         """录像功能with人脸检测 - 检测到人脸时输出1，支持提前停止"""
         if filename is None:
-            filename = f"video_face_{int(time.time())}.mp4"
-        
-        # 使用当前目录下的camera文件夹
-        camera_dir = os.path.join(os.getcwd(), "camera")
-        if not os.path.exists(camera_dir):
-            os.makedirs(camera_dir)
+            filename = f"video_face_{time.time_ns() // 1_000_000_000}.mp4"
         
-        filepath = os.path.join(camera_dir, filename)
+        filepath = str(self.out_dir / filename)
         
         # 获取摄像头参数
         fps = int(self.cap.get(cv2.CAP_PROP_FPS))
@@ -219,8 +783,7 @@ class USBCamera:
         height = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
         
         # 设置视频编码器
-        fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-        out = cv2.VideoWriter(filepath, fourcc, fps, (width, height))
+        out = self._open_writer(filepath, fps, (width, height))
         
         print(f"开始录像with人脸检测，持续 {duration} 秒...")
         if self.headless_mode:
@@ -228,44 +791,71 @@ class USBCamera:
         else:
             print("按 Ctrl+C 或 'q' 键提前停止录像")
         
-        start_time = time.time()
+        start_time = time.monotonic()
+        deadline = start_time + duration  # 单调时钟截止时刻，只计算一次
         face_detected_once = False  # 记录是否曾检测到人脸
-        frame_count = 0
         self.stop_recording = False
+        self._detection_interval = detection_interval  # 初始检测间隔，运行中根据统计自动调整
         
-        # 设置信号处理器
-        def signal_handler(sig, frame):
-            print("\n收到中断信号，正在停止录像...")
-            self.stop_recording = True
-        
-        signal.signal(signal.SIGINT, signal_handler)
+        # 采集、检测、写入分别在三个线程中进行：
+        # 采集线程把每一帧交给写入线程编码，同时把最新帧留给检测循环，
+        # 人脸检测的耗时不再拖慢摄像头读取和视频编码
+        # 先安装信号处理器，再启动线程
+        previous_handler = self._install_stop_handler("\n收到中断信号，正在停止录像...")
+        write_q = queue.Queue(maxsize=PIPELINE_PREFETCH)
+        writer = threading.Thread(target=self._write_loop, args=(out, write_q), daemon=True)
+        writer.start()
+        self._start_grabber(write_q)
         
+        last_seq = 0
+        frame_count = 0  # 已处理的帧数（采集序号可能跳帧，按键检查按处理帧计数）
+        next_detect = 0
+        pending = deque()  # 已提交、尚未取回结果的检测任务
+        stop_event = self._stop_event
         try:
-            while (time.time() - start_time < duration) and not self.stop_recording:
-                ret, frame = self.cap.read()
-                if not ret:
+            while time.monotonic() < deadline and not stop_event.is_set():
+                item = self._next_frame(timeout=0.5)
+                if self._grab_failed:
                     print("无法读取摄像头画面")
                     break
+                if item is None or item[0] == last_seq:
+                    continue
+                last_seq, frame = item
+                frame_count += 1
                 
-                # 每隔几帧进行一次人脸检测以提高性能
-                if frame_count % detection_interval == 0:
-                    faces = self.detect_faces(frame)
+                # 按提交顺序取回已完成的检测结果
+                results = self._collect_detections(pending)
+                for faces in results:
+                    self._last_faces = faces
                     
                     # 每次检测到人脸都输出1
                     if len(faces) > 0:
                         print("1")
                         face_detected_once = True
-                        
-                        # 在图像上绘制人脸框
-                        for (x, y, w, h) in faces:
-                            cv2.rectangle(frame, (x, y), (x+w, y+h), (255, 0, 0), 2)
                 
-                # 写入视频
-                out.write(frame)
-                frame_count += 1
+                # 有新检测结果时重新初始化跟踪器，否则由跟踪器更新人脸框
+                if results:
+                    self._reset_trackers(frame, self._last_faces)
+                else:
+                    ok, boxes = self._update_trackers(frame)
+                    if not ok:
+                        next_detect = last_seq  # 跟踪丢失，立即重新检测
+                    elif boxes is not None:
+                        self._last_faces = boxes
                 
-                # 非无头模式才检查键盘输入
-                if not self.headless_mode:
+                # 每隔几帧把最新帧提交给检测线程池，主循环不等待检测完成；
+                # 画面没有变化时跳过这次检测，沿用上次的人脸框
+                if last_seq >= next_detect and len(pending) < DETECT_WORKERS:
+                    next_detect = last_seq + self._detection_interval
+                    if self._scene_changed(frame):
+                        pending.append(self._det_pool.submit(self._timed_detect, frame))
+                
+                # 定期根据统计调整检测间隔
+                if (frame_count & (TUNE_EVERY - 1)) == 0:
+                    self._tune_detection_interval()
+                
+                # 非无头模式才检查键盘输入，每4帧检查一次
+                if self._poll_keys and (frame_count & 3) == 0:
                     if cv2.waitKey(1) & 0xFF == ord('q'):
                         print("用户按下 'q' 键，停止录像")
                         break
@@ -274,13 +864,23 @@ class USBCamera:
             print("\n用户中断，停止录像")
         
         finally:
+            self._restore_handler(previous_handler)
+            self._stop_grabber()
+            for faces in self._collect_detections(pending, wait=True):
+                if len(faces) > 0:
+                    print("1")
+                    face_detected_once = True
+            write_q.put(None)  # 结束标记，写入线程编码完剩余帧后退出
+            writer.join()
             out.release()
+            self._report_dropped()
             if not self.headless_mode:
                 cv2.destroyAllWindows()
         
-        elapsed_time = time.time() - start_time
+        elapsed_time = time.monotonic() - start_time
         print(f"\n录像已保存至: {filepath}")
         print(f"实际录像时长: {elapsed_time:.1f} 秒")
+        self._print_metrics()
         if face_detected_once:
             print("录像过程中检测到人脸")
         else:
@@ -301,59 +901,94 @@ class USBCamera:
         
         face_detected_ever = False
         self.stop_recording = False
-        frame_count = 0
-        detection_interval = 5
-        last_status_time = time.time()
-        
-        def signal_handler(sig, frame):
-            print("\n收到中断信号，正在退出...")
-            self.stop_recording = True
+        detection_interval = 5  # 初始检测间隔，运行中根据统计自动调整
+        self._detection_interval = detection_interval
+        next_detect = 0  # 下一次检测的帧序号，代替逐帧取模
+        pending = deque()  # 已提交、尚未取回结果的检测任务
+        last_faces = ()
+        next_status_time = time.monotonic() + 10
         
-        signal.signal(signal.SIGINT, signal_handler)
+        # 采集线程持续读取画面，检测循环只处理最新的一帧
+        # 无头模式不显示画面，只解码需要检测的帧
+        previous_handler = self._install_stop_handler("\n收到中断信号，正在退出...")
+        self._start_grabber(retrieve_every=None if self.headless_mode else 1)
+        last_seq = 0
+        frame_count = 0  # 已处理的帧数（采集序号可能跳帧，按键检查按处理帧计数）
+        stop_event = self._stop_event
         
         try:
-            while not self.stop_recording:
-                ret, frame = self.cap.read()
-                if not ret or frame is None:
-                    if not self.stop_recording:
+            while not stop_event.is_set():
+                item = self._next_frame(timeout=0.5)
+                if self._grab_failed:
+                    if not stop_event.is_set():
                         print("无法读取摄像头画面")
                     break
+                if item is None or item[0] == last_seq:
+                    continue
+                last_seq, frame = item
+                frame_count += 1
                 
-                # 每隔几帧检测一次人脸
-                if frame_count % detection_interval == 0:
-                    faces = self.detect_faces(frame)
-                    
-                    if len(faces) > 0:
+                # 取回已完成的检测结果，同时用于输出和绘制
+                results = self._collect_detections(pending)
+                for last_faces in results:
+                    if len(last_faces) > 0:
                         print("1")
                         face_detected_ever = True
                 
+                # 显示画面时，两次检测之间由跟踪器逐帧更新人脸框
+                if not self.headless_mode:
+                    if results:
+                        self._reset_trackers(frame, last_faces)
+                    else:
+                        ok, boxes = self._update_trackers(frame)
+                        if not ok:
+                            next_detect = last_seq  # 跟踪丢失，立即重新检测
+                        elif boxes is not None:
+                            last_faces = boxes
+                
+                # 每隔几帧提交一次检测，画面没有变化时跳过这次检测，沿用上次的人脸框。
+                # 只有本帧稍后要绘制人脸框时才提交副本，否则直接传递引用
+                if last_seq >= next_detect and len(pending) < DETECT_WORKERS:
+                    next_detect = last_seq + self._detection_interval
+                    if self._scene_changed(frame):
+                        will_draw = not self.headless_mode and len(last_faces) > 0
+                        pending.append(self._det_pool.submit(self._timed_detect,
+                                                             frame.copy() if will_draw else frame))
+                
+                # 定期根据统计调整检测间隔
+                if (frame_count & (TUNE_EVERY - 1)) == 0:
+                    self._tune_detection_interval()
+                
                 # 如果不是无头模式，显示图像
                 if not self.headless_mode:
-                    if frame_count % detection_interval == 0:
-                        faces = self.detect_faces(frame)
-                        if len(faces) > 0:
-                            for (x, y, w, h) in faces:
-                                cv2.rectangle(frame, (x, y), (x+w, y+h), (255, 0, 0), 2)
-                                cv2.putText(frame, 'Face Detected', (x, y-10), 
-                                           cv2.FONT_HERSHEY_SIMPLEX, 0.9, (255, 0, 0), 2)
+                    # 没有跟踪器时沿用上次的人脸框，避免画面闪烁
+                    for (x, y, w, h) in last_faces:
+                        cv2.rectangle(frame, (x, y), (x+w, y+h), (255, 0, 0), 2)
+                        cv2.putText(frame, 'Face Detected', (x, y-10), 
+                                   cv2.FONT_HERSHEY_SIMPLEX, 0.9, (255, 0, 0), 2)
                     
                     cv2.imshow('Real-time Face Detection', frame)
                     
-                    if cv2.waitKey(1) & 0xFF == ord('q'):
+                    # 每4帧处理一次窗口事件和按键
+                    if self._poll_keys and (frame_count & 3) == 0 and cv2.waitKey(1) & 0xFF == ord('q'):
                         print("用户按下 'q' 键，退出检测")
                         break
                 else:
-                    current_time = time.time()
-                    if current_time - last_status_time >= 10:
-                        print(f"检测中... 已处理 {frame_count} 帧，检测方法: {self.face_detection_method}")
-                        last_status_time = current_time
-                
-                frame_count += 1
+                    current_time = time.monotonic()
+                    if current_time >= next_status_time:
+                        print(f"检测中... 已处理 {last_seq} 帧，检测方法: {self.face_detection_method}")
+                        self._print_metrics()
+                        next_status_time = current_time + 10
         
         except KeyboardInterrupt:
             print("\n用户中断，退出检测")
         
         finally:
+            self._restore_handler(previous_handler)
+            self._stop_grabber()
+            for faces in self._collect_detections(pending, wait=True):
+                if len(faces) > 0:
+                    face_detected_ever = True
             if not self.headless_mode:
                 cv2.destroyAllWindows()
         
@@ -365,14 +1000,9 @@ class USBCamera:
     def start_recording(self, filename=None, duration=10):
         """录像功能"""
         if filename is None:
-            filename = f"video_{int(time.time())}.mp4"
+            filename = f"video_{time.time_ns() // 1_000_000_000}.mp4"
         
-        # 使用当前目录下的camera文件夹
-        camera_dir = os.path.join(os.getcwd(), "camera")
-        if not os.path.exists(camera_dir):
-            os.makedirs(camera_dir)
-        
-        filepath = os.path.join(camera_dir, filename)
+        filepath = str(self.out_dir / filename)
         
         # 获取摄像头参数
         fps = int(self.cap.get(cv2.CAP_PROP_FPS))
@@ -380,20 +1010,29 @@ class USBCamera:
         height = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
         
         # 设置视频编码器
-        fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-        out = cv2.VideoWriter(filepath, fourcc, fps, (width, height))
+        out = self._open_writer(filepath, fps, (width, height))
         
         print(f"开始录像，持续 {duration} 秒...")
-        start_time = time.time()
+        deadline = time.monotonic() + duration
         
-        while time.time() - start_time < duration:
-            ret, frame = self.cap.read()
-            if ret:
-                out.write(frame)
-            else:
-                break
+        # 采集和编码在两个线程中流水进行，每帧耗时取两者较大值而不是两者之和
+        write_q = queue.Queue(maxsize=PIPELINE_PREFETCH)
+        writer = threading.Thread(target=self._write_loop, args=(out, write_q), daemon=True)
+        writer.start()
+        self._start_grabber(write_q)
+        
+        try:
+            while not self._grab_failed:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or self._stop_event.wait(min(remaining, 0.5)):
+                    break
+        finally:
+            self._stop_grabber()
+            write_q.put(None)  # 结束标记，写入线程编码完剩余帧后退出
+            writer.join()
+            out.release()
+            self._report_dropped()
         
-        out.release()
         print(f"录像已保存至: {filepath}")
         return filepath
     
@@ -401,8 +1040,9 @@ class USBCamera:
         """预览功能with人脸检测"""
         print(f"开始预览with人脸检测 {duration} 秒...")
         
-        start_time = time.time()
-        while time.time() - start_time < duration:
+        headless = self.headless_mode  # 无头模式下不显示窗口、不处理按键
+        deadline = time.monotonic() + duration
+        while time.monotonic() < deadline:
             ret, frame = self.cap.read()
             if ret:
                 # 检测人脸
@@ -412,41 +1052,51 @@ class USBCamera:
                     print("1")  # 检测到人脸时输出1
                     
                     # 在图像上绘制人脸框
-                    for (x, y, w, h) in faces:
-                        cv2.rectangle(frame, (x, y), (x+w, y+h), (255, 0, 0), 2)
-                        cv2.putText(frame, 'Face Detected', (x, y-10), 
-                                   cv2.FONT_HERSHEY_SIMPLEX, 0.9, (255, 0, 0), 2)
-                
-                cv2.imshow('USB Camera Preview - Face Detection', frame)
+                    if not headless:
+                        for (x, y, w, h) in faces:
+                            cv2.rectangle(frame, (x, y), (x+w, y+h), (255, 0, 0), 2)
+                            cv2.putText(frame, 'Face Detected', (x, y-10), 
+                                       cv2.FONT_HERSHEY_SIMPLEX, 0.9, (255, 0, 0), 2)
                 
-                # 按 'q' 键退出预览
-                if cv2.waitKey(1) & 0xFF == ord('q'):
-                    break
+                if not headless:
+                    cv2.imshow('USB Camera Preview - Face Detection', frame)
+                    
+                    # 按 'q' 键退出预览
+                    if cv2.waitKey(1) & 0xFF == ord('q'):
+                        break
             else:
                 print("无法读取摄像头画面")
                 break
         
-        cv2.destroyAllWindows()
+        if not headless:
+            cv2.destroyAllWindows()
         print("预览结束")
     
     def preview_camera(self, duration=5):
         """预览功能"""
         print(f"开始预览 {duration} 秒...")
         
-        start_time = time.time()
-        while time.time() - start_time < duration:
-            ret, frame = self.cap.read()
+        headless = self.headless_mode  # 无头模式下不显示窗口、不处理按键
+        deadline = time.monotonic() + duration
+        while time.monotonic() < deadline:
+            # 无头模式不显示画面，只grab不解码
+            if headless:
+                ret, frame = self.cap.grab(), None
+            else:
+                ret, frame = self.cap.read()
             if ret:
-                cv2.imshow('USB Camera Preview', frame)
-                
-                # 按 'q' 键退出预览
-                if cv2.waitKey(1) & 0xFF == ord('q'):
-                    break
+                if not headless:
+                    cv2.imshow('USB Camera Preview', frame)
+                    
+                    # 按 'q' 键退出预览
+                    if cv2.waitKey(1) & 0xFF == ord('q'):
+                        break
             else:
                 print("无法读取摄像头画面")
                 break
         
-        cv2.destroyAllWindows()
+        if not headless:
+            cv2.destroyAllWindows()
         print("预览结束")
     
     def capture_multiple_photos(self, count=5, interval=2):
@@ -455,7 +1105,7 @@ class USBCamera:
         
         photos = []
         for i in range(count):
-            filename = f"series_{int(time.time())}_{i+1}.jpg"
+            filename = f"series_{time.time_ns() // 1_000_000_000}_{i+1}.jpg"
             filepath = self.capture_photo(filename)
             if filepath:
                 photos.append(filepath)
@@ -490,12 +1140,16 @@ class USBCamera:
         """清理资源"""
         try:
             self.stop_recording = True  # 确保停止所有录制
-            time.sleep(0.1)  # 给线程一点时间停止
+            self._stop_grabber()  # 等待采集线程退出后再释放摄像头
+            if self._det_pool is not None:
+                self._det_pool.shutdown(wait=True)
+                self._det_pool = None
             
             if self.cap is not None:
                 self.cap.release()
                 self.cap = None
-            cv2.destroyAllWindows()
+            if not self.headless_mode:
+                cv2.destroyAllWindows()
             print("摄像头资源已释放")
         except Exception as e:
             print(f"清理摄像头资源时出错: {e}")
@@ -7,6 +7,7 @@ GPIO统一管理器
 
 import threading
 import time
+import types
 
 # 尝试导入GPIO模块
 try:
@@ -16,58 +17,36 @@ except ImportError:
     GPIO_AVAILABLE = False
     print("警告: 无法导入GPIO模块，将使用模拟模式")
     
-    # 模拟GPIO类
-    class MockGPIO:
-        BOARD = "BOARD"
-        BCM = "BCM"
-        OUT = "OUT"
-        IN = "IN"
-        HIGH = 1
-        LOW = 0
-        PUD_UP = "PUD_UP"
-        PUD_DOWN = "PUD_DOWN"
-        
-        _pin_states = {}
-        _mode = None
-        
-        @classmethod
-        def setwarnings(cls, state):
-            pass
-        
-        @classmethod
-        def setmode(cls, mode):
-            cls._mode = mode
-        
-        @classmethod
-        def getmode(cls):
-            return cls._mode
-        
-        @classmethod
-        def setup(cls, pin, mode, **kwargs):
-            cls._pin_states[pin] = cls.LOW
-        
-        @classmethod
-        def output(cls, pin, value):
-            cls._pin_states[pin] = value
-        
-        @classmethod
-        def input(cls, pin):
-            return cls._pin_states.get(pin, cls.LOW)
-        
-        @classmethod
-        def gpio_function(cls, pin):
-            return 0  # ALT0
-        
-        @classmethod
-        def cleanup(cls, pin=None):
-            if pin is None:
-                cls._pin_states.clear()
-            else:
-                cls._pin_states.pop(pin, None)
-        
-        @classmethod
-        def PWM(cls, pin, frequency):
-            return MockPWM(pin, frequency)
+    # 模拟GPIO：普通函数加SimpleNamespace，调用时没有classmethod的绑定开销
+    _pin_states = {}
+    _mock_mode = None
+    
+    def _mock_setmode(mode):
+        global _mock_mode
+        _mock_mode = mode
+    
+    def _mock_getmode():
+        return _mock_mode
+    
+    def _mock_setup(pin, mode, **kwargs):
+        # 与RPi.GPIO一致，支持一次配置多个引脚
+        for p in (pin if isinstance(pin, (list, tuple)) else (pin,)):
+            _pin_states[p] = 0
+    
+    def _mock_output(pin, value):
+        _pin_states[pin] = value
+    
+    def _mock_input(pin):
+        return _pin_states.get(pin, 0)
+    
+    def _mock_gpio_function(pin):
+        return 0  # ALT0
+    
+    def _mock_cleanup(pin=None):
+        if pin is None:
+            _pin_states.clear()
+        else:
+            _pin_states.pop(pin, None)
     
     class MockPWM:
         def __init__(self, pin, frequency):
@@ -83,8 +62,47 @@ except ImportError:
         def ChangeFrequency(self, freq):
             self.frequency = freq
     
+    MockGPIO = types.SimpleNamespace(
+        BOARD="BOARD",
+        BCM="BCM",
+        OUT="OUT",
+        IN="IN",
+        HIGH=1,
+        LOW=0,
+        PUD_UP="PUD_UP",
+        PUD_DOWN="PUD_DOWN",
+        setwarnings=lambda state: None,
+        setmode=_mock_setmode,
+        getmode=_mock_getmode,
+        setup=_mock_setup,
+        output=_mock_output,
+        input=_mock_input,
+        gpio_function=_mock_gpio_function,
+        cleanup=_mock_cleanup,
+        PWM=MockPWM,
+    )
+    
     GPIO = MockGPIO
 
+# 引脚映射表，按引脚号直接索引，-1表示该位置没有对应引脚
+# BCM -> BOARD（BCM 0~27）
+_BCM2BOARD = (
+    -1, -1, 3, 5, 7, 29, 31, 26,
+    24, 21, 19, 23, 32, 33, 8, 10,
+    36, 11, 12, 35, 38, 40, 15, 16,
+    18, 22, 37, 13,
+)
+
+# BOARD -> BCM（物理引脚 0~40）
+_BOARD2BCM = (
+    -1, -1, -1, 2, -1, 3, -1, 4,
+    14, -1, 15, 17, 18, 27, -1, 22,
+    23, -1, 24, 10, -1, 9, 25, 11,
+    8, -1, 7, -1, -1, 5, -1, 6,
+    12, 13, -1, 19, 16, 26, 20, -1,
+    21,
+)
+
 
 class GPIOManager:
     """GPIO统一管理器 - 单例模式"""
@@ -108,17 +126,6 @@ class GPIOManager:
         self.gpio_initialized = False
         self.initialization_lock = threading.Lock()
         
-        # 引脚映射表 (BCM -> BOARD)
-        self.bcm_to_board = {
-            2: 3, 3: 5, 4: 7, 5: 29, 6: 31, 7: 26, 8: 24, 9: 21,
-            10: 19, 11: 23, 12: 32, 13: 33, 14: 8, 15: 10, 16: 36,
-            17: 11, 18: 12, 19: 35, 20: 38, 21: 40, 22: 15, 23: 16,
-            24: 18, 25: 22, 26: 37, 27: 13
-        }
-        
-        # 引脚映射表 (BOARD -> BCM)
-        self.board_to_bcm = {v: k for k, v in self.bcm_to_board.items()}
-        
         print("GPIO管理器已初始化")
     
     def init_gpio(self, mode=GPIO.BOARD):
@@ -149,34 +156,49 @@ class GPIOManager:
     
     def allocate_pin(self, pin, module_name, pin_mode, **kwargs):
         """分配引脚给指定模块"""
+        return self.allocate_pins([pin], module_name, pin_mode, **kwargs)
+    
+    def allocate_pins(self, pins, module_name, pin_mode, **kwargs):
+        """
+        一次分配多个相同模式的引脚给指定模块，只调用一次GPIO.setup
+        :param pins: 引脚号列表
+        :param module_name: 模块名称
+        :param pin_mode: 引脚模式 (GPIO.OUT / GPIO.IN)
+        :return: 全部分配成功返回True；任一引脚无效或被占用时不分配任何引脚，返回False
+        """
         if not self.gpio_initialized:
             print("错误: GPIO未初始化，请先调用init_gpio()")
             return False
         
-        # 标准化引脚号（根据当前模式）
-        normalized_pin = self._normalize_pin(pin)
-        if normalized_pin is None:
-            print(f"无效的引脚号: {pin}")
-            return False
-        
-        # 检查引脚是否已被占用
-        if normalized_pin in self.allocated_pins:
-            current_module = self.allocated_pins[normalized_pin]
-            if current_module != module_name:
-                print(f"引脚{normalized_pin}已被{current_module}占用，{module_name}无法使用")
+        # 标准化引脚号（根据当前模式），并一次性检查占用情况
+        new_pins = []
+        for pin in pins:
+            normalized_pin = self._normalize_pin(pin)
+            if normalized_pin is None:
+                print(f"无效的引脚号: {pin}")
                 return False
-            else:
+            
+            if normalized_pin in self.allocated_pins:
+                current_module = self.allocated_pins[normalized_pin]
+                if current_module != module_name:
+                    print(f"引脚{normalized_pin}已被{current_module}占用，{module_name}无法使用")
+                    return False
                 print(f"引脚{normalized_pin}已分配给{module_name}")
-                return True
+            elif normalized_pin not in new_pins:
+                new_pins.append(normalized_pin)
+        
+        if not new_pins:
+            return True
         
         try:
-            # 配置引脚
-            GPIO.setup(normalized_pin, pin_mode, **kwargs)
-            self.allocated_pins[normalized_pin] = module_name
-            print(f"引脚{normalized_pin}已分配给{module_name} (模式: {pin_mode})")
+            # 配置引脚，RPi.GPIO的setup接受引脚列表
+            GPIO.setup(new_pins if len(new_pins) > 1 else new_pins[0], pin_mode, **kwargs)
+            for normalized_pin in new_pins:
+                self.allocated_pins[normalized_pin] = module_name
+            print(f"引脚{', '.join(map(str, new_pins))}已分配给{module_name} (模式: {pin_mode})")
             return True
         except Exception as e:
-            print(f"引脚{normalized_pin}配置失败: {e}")
+            print(f"引脚{', '.join(map(str, new_pins))}配置失败: {e}")
             return False
     
     def release_pin(self, pin, module_name):
@@ -216,11 +238,15 @@ class GPIOManager:
             return pin
         
         if from_mode == GPIO.BCM and to_mode == GPIO.BOARD:
-            return self.bcm_to_board.get(pin)
+            table = _BCM2BOARD
         elif from_mode == GPIO.BOARD and to_mode == GPIO.BCM:
-            return self.board_to_bcm.get(pin)
+            table = _BOARD2BCM
         else:
             return None
+        
+        if not 0 <= pin < len(table) or table[pin] < 0:
+            return None
+        return table[pin]
     
     def output(self, pin, value):
         """GPIO输出"""
@@ -335,6 +361,10 @@ def allocate_pin(pin, module_name, pin_mode, **kwargs):
     """分配引脚"""
     return gpio_manager.allocate_pin(pin, module_name, pin_mode, **kwargs)
 
+def allocate_pins(pins, module_name, pin_mode, **kwargs):
+    """批量分配引脚"""
+    return gpio_manager.allocate_pins(pins, module_name, pin_mode, **kwargs)
+
 def release_pin(pin, module_name):
     """释放引脚"""
     gpio_manager.release_pin(pin, module_name)
@@ -54,35 +54,55 @@ def check_gpio_status():
     print(f"\n系统GPIO状态:")
     try:
         # 读取 /sys/class/gpio/export 状态
-        if os.path.exists("/sys/class/gpio"):
-            exported_gpios = []
-            for item in os.listdir("/sys/class/gpio"):
-                if item.startswith("gpio"):
-                    exported_gpios.append(item)
-            
-            if exported_gpios:
-                print(f"已导出的GPIO: {', '.join(exported_gpios)}")
-            else:
-                print("没有已导出的GPIO")
+        # scandir直接返回目录项，不需要先检查目录是否存在
+        with os.scandir("/sys/class/gpio") as entries:
+            exported_gpios = [entry.name for entry in entries if entry.name.startswith("gpio")]
+        
+        if exported_gpios:
+            print(f"已导出的GPIO: {', '.join(exported_gpios)}")
         else:
-            print("/sys/class/gpio 不存在")
+            print("没有已导出的GPIO")
+    except FileNotFoundError:
+        print("/sys/class/gpio 不存在")
     except Exception as e:
         print(f"无法读取系统GPIO状态: {e}")
 
+# 进程命令行中出现这些关键字时认为可能在使用GPIO
+GPIO_PROCESS_KEYWORDS = frozenset(['gpio', 'rpigpio', 'pigpio', 'wiringpi'])
+
+def _read_process_command(pid):
+    """
+    读取进程的命令行，内核线程等没有命令行时使用comm中的进程名
+    :param pid: 进程号字符串
+    :return: 命令行字符串，进程已退出或无权限时返回None
+    """
+    try:
+        with open(f"/proc/{pid}/cmdline", 'rb') as f:
+            cmdline = f.read().replace(b'\0', b' ').strip()
+        if cmdline:
+            return cmdline.decode(errors='replace')
+        with open(f"/proc/{pid}/comm", 'r') as f:
+            return f"[{f.read().strip()}]"
+    except OSError:
+        return None
+
 def check_processes():
     """检查可能使用GPIO的进程"""
     print(f"\n检查GPIO相关进程:")
     
-    import subprocess
     try:
-        # 查找可能使用GPIO的进程
-        result = subprocess.run(['ps', 'aux'], capture_output=True, text=True)
-        lines = result.stdout.split('\n')
-        
+        # 直接扫描/proc，不再启动ps子进程
         gpio_processes = []
-        for line in lines:
-            if any(keyword in line.lower() for keyword in ['gpio', 'rpigpio', 'pigpio', 'wiringpi']):
-                gpio_processes.append(line)
+        with os.scandir("/proc") as entries:
+            for entry in entries:
+                if not entry.name.isdigit():
+                    continue
+                command = _read_process_command(entry.name)
+                if command is None:
+                    continue
+                lowered = command.lower()
+                if any(keyword in lowered for keyword in GPIO_PROCESS_KEYWORDS):
+                    gpio_processes.append(f"{entry.name:>7} {command}")
         
         if gpio_processes:
             print("发现GPIO相关进程:")
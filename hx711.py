@@ -8,6 +8,41 @@ import time
 import random
 import json
 import os
+import statistics
+import threading
+import mmap
+import ctypes
+import struct
+from array import array
+from collections import deque
+
+# NumPy可用时批量统计采样值（可选）
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+# libgpiod v2可用时，用DT下降沿事件等待数据就绪（可选）
+try:
+    import gpiod
+    from gpiod.line import Direction, Edge
+    GPIOD_AVAILABLE = hasattr(gpiod, 'request_lines')
+except ImportError:
+    GPIOD_AVAILABLE = False
+
+# BCM2835 GPIO寄存器（/dev/gpiomem中的32位字偏移）
+GPSET0 = 0x1C // 4  # 置位寄存器
+GPCLR0 = 0x28 // 4  # 清零寄存器
+GPLEV0 = 0x34 // 4  # 电平寄存器
+
+# 物理引脚号到BCM编号的转换（仅支持常用引脚），用于直接寄存器访问
+BOARD_TO_BCM = {
+    3: 2, 5: 3, 7: 4, 11: 17, 13: 27, 15: 22, 19: 10, 21: 9,
+    23: 11, 29: 5, 31: 6, 33: 13, 35: 19, 37: 26, 8: 14, 10: 15,
+    12: 18, 16: 23, 18: 24, 22: 25, 24: 8, 26: 7, 32: 12, 36: 16,
+    38: 20, 40: 21
+}
 
 
 # SCK G17
@@ -58,13 +93,79 @@ try:
 except ImportError:
     try:
         import RPi.GPIO as GPIO
+        GPIO_AVAILABLE = True
         GPIO_MANAGER_AVAILABLE = False
         print("HX711: 使用直接GPIO控制")
     except ImportError:
         GPIO = MockGPIO
+        GPIO_AVAILABLE = False
         GPIO_MANAGER_AVAILABLE = False
         print("HX711: 使用模拟GPIO进行测试")
 
+# 校准数据的二进制缓存：系数、零点偏移(double)，增益、是否已校准(int)，保存时间(24字节)
+CALIBRATION_STRUCT = struct.Struct('<ddii24s')
+
+# 实时读取：隔离的CPU核心（需在/boot/cmdline.txt中加入isolcpus=3）和SCHED_FIFO优先级
+REALTIME_CPU = 3
+REALTIME_PRIORITY = 80
+
+def _parse_cpu_list(text):
+    """
+    解析内核CPU列表格式，如"2-3,5"
+    :return: CPU编号集合
+    """
+    cpus = set()
+    for part in text.strip().split(','):
+        if not part:
+            continue
+        if '-' in part:
+            first, last = part.split('-')
+            cpus.update(range(int(first), int(last) + 1))
+        else:
+            cpus.add(int(part))
+    return cpus
+
+def _map_gpio_registers():
+    """
+    映射/dev/gpiomem，直接读写GPIO寄存器
+    :return: 按32位字索引的寄存器数组，不可用时返回None
+    """
+    try:
+        fd = os.open("/dev/gpiomem", os.O_RDWR | os.O_SYNC)
+    except OSError:
+        return None
+    try:
+        mm = mmap.mmap(fd, 4096, mmap.MAP_SHARED, mmap.PROT_READ | mmap.PROT_WRITE)
+    except OSError:
+        return None
+    finally:
+        os.close(fd)
+    return (ctypes.c_uint32 * 1024).from_buffer(mm)
+
+def _read_bits_regs(regs, sck_mask, dt_shift, gain_pulses, levels):
+    """
+    直接读写GPIO寄存器读出24位数据：每一位置位/清零SCK，并保存整个GPLEV0快照，
+    时钟结束后再从快照中取出DT位拼成数值，时钟循环中不做位运算
+    :param regs: _map_gpio_registers()返回的寄存器数组
+    :param sck_mask: SCK引脚位掩码 (1 << BCM编号)
+    :param dt_shift: DT引脚的BCM编号
+    :param gain_pulses: 读完后额外的增益设置脉冲数
+    :param levels: 24个元素的array('I')，保存每一位的GPLEV0快照
+    :return: 未做符号扩展的24位数值
+    """
+    for i in range(24):
+        regs[GPSET0] = sck_mask
+        regs[GPCLR0] = sck_mask
+        levels[i] = regs[GPLEV0]
+    for _ in range(gain_pulses):
+        regs[GPSET0] = sck_mask
+        regs[GPCLR0] = sck_mask
+    
+    value = 0
+    for level in levels:
+        value = (value << 1) | ((level >> dt_shift) & 1)
+    return value
+
 class HX711:
     def __init__(self, sck_pin=11, dt_pin=13, gain=128, auto_load_calibration=True):
         """
@@ -79,13 +180,25 @@ class HX711:
         self.gain = gain
         self.coefficient = 0.00127551  # 默认校准系数
         self.offset = 41562  # 默认零点偏移值
+        self._recompute()
         self.is_calibrated = False  # 初始状态为未校准
         self.calibration_file = "hx711_calibration.json"  # 校准数据文件
+        self.calibration_cache = "hx711_calibration.bin"  # 校准数据的二进制缓存，比JSON新时直接加载
         
         # 重量稳定算法
-        self.weight_buffer = []
         self.buffer_size = 3
+        self.weight_buffer = deque(maxlen=self.buffer_size)
+        self._weight_sum = 0.0  # 缓冲区内重量之和，随入队出队增量更新
+        
+        # 后台采样：采样线程持续更新latest_weight，显示循环直接读取
+        self.latest_weight = 0.0
+        self._sampling_thread = None
+        self._sampling_stop = threading.Event()
         self._simulate_weight = False
+        self._gpio_regs = None  # 映射的GPIO寄存器，可用时读取数据不经过RPi.GPIO
+        self._realtime = False  # 读取时是否切换到SCHED_FIFO实时调度
+        self._realtime_cpu = None  # 读取时临时绑定的隔离CPU核心，None表示不绑定
+        self._dt_request = None  # gpiod的DT引脚边沿事件请求
         
         # 自动加载校准数据
         if auto_load_calibration:
@@ -126,6 +239,12 @@ class HX711:
         # 设置增益对应的脉冲数
         self._set_gain_pulses()
         
+        # 真实GPIO上优先直接访问寄存器，读取24位时不经过RPi.GPIO
+        if self.gpio_initialized and GPIO_AVAILABLE:
+            self._setup_registers()
+            self._setup_realtime()
+            self._setup_edge_events()
+        
         # 初始读取一次，稳定传感器
         if self.gpio_initialized:
             self.read_raw()
@@ -141,11 +260,31 @@ class HX711:
         else:
             self.gain_pulses = 1
     
+    def _setup_registers(self):
+        """映射GPIO寄存器并计算SCK/DT的BCM位，不可用时保持RPi.GPIO路径"""
+        if GPIO_MANAGER_AVAILABLE and gpio_manager.gpio_mode == GPIO.BCM:
+            sck_bcm, dt_bcm = self.SCK, self.DT
+        else:
+            sck_bcm, dt_bcm = BOARD_TO_BCM.get(self.SCK), BOARD_TO_BCM.get(self.DT)
+        if sck_bcm is None or dt_bcm is None:
+            return
+        
+        self._gpio_regs = _map_gpio_registers()
+        if self._gpio_regs is not None:
+            self._sck_mask = 1 << sck_bcm
+            self._dt_shift = dt_bcm
+            self._levels = array('I', bytes(4 * 24))  # 每一位的GPLEV0快照，复用
+            print("HX711: 使用/dev/gpiomem直接寄存器访问")
+    
     def is_ready(self):
         """检查HX711是否准备好进行读取"""
         if not self.gpio_initialized:
             return True  # 模拟模式总是准备就绪
         
+        regs = self._gpio_regs
+        if regs is not None:
+            return not (regs[GPLEV0] >> self._dt_shift) & 1
+        
         if GPIO_MANAGER_AVAILABLE:
             return input_pin(self.DT) == GPIO.LOW
         else:
@@ -176,11 +315,15 @@ class HX711:
         读取原始24位数据
         返回带符号的24位整数
         """
-        # 等待传感器准备就绪
+        # 等待传感器准备就绪：有边沿事件时由内核唤醒，否则轮询
         retry_count = 0
-        while not self.is_ready() and retry_count < 100:
-            time.sleep(0.001)
-            retry_count += 1
+        if self._dt_request is not None:
+            if not self._wait_ready_edge(0.1):
+                retry_count = 100
+        else:
+            while not self.is_ready() and retry_count < 100:
+                time.sleep(0.001)
+                retry_count += 1
         
         if retry_count >= 100:
             # 模拟更精确的称重数据，基于Arduino的实际参数
@@ -197,6 +340,25 @@ class HX711:
             
             return int(base_value + noise)
         
+        # 移位读取期间以实时优先级运行，避免被抢占导致时序错乱
+        prev_cpus = self._enter_realtime()
+        try:
+            value = self._shift_in()
+        finally:
+            self._leave_realtime(prev_cpus)
+        
+        # 24位补码转换为有符号整数，由int.from_bytes一次完成符号扩展
+        return int.from_bytes(value.to_bytes(3, 'big'), 'big', signed=True)
+    
+    def _shift_in(self):
+        """
+        移位读出24位数据并发送增益设置脉冲
+        :return: 未做符号扩展的24位数值
+        """
+        if self._gpio_regs is not None:
+            return _read_bits_regs(self._gpio_regs, self._sck_mask, self._dt_shift,
+                                   self.gain_pulses, self._levels)
+        
         value = 0
         
         # 读取24位数据
@@ -212,20 +374,128 @@ class HX711:
             self._gpio_output(self.SCK, GPIO.HIGH)
             self._gpio_output(self.SCK, GPIO.LOW)
         
-        # 处理24位补码转换为32位有符号整数
-        if value & 0x800000:  # 如果最高位为1（负数）
-            value = value | 0xFF000000  # 扩展符号位
-            value = value - 0x100000000  # 转换为负数
-        
         return value
     
+    def _setup_edge_events(self):
+        """通过libgpiod申请DT引脚的下降沿事件，等待就绪时由内核唤醒，而不是轮询"""
+        if not GPIOD_AVAILABLE:
+            return
+        if GPIO_MANAGER_AVAILABLE and gpio_manager.gpio_mode == GPIO.BCM:
+            dt_bcm = self.DT
+        else:
+            dt_bcm = BOARD_TO_BCM.get(self.DT)
+        if dt_bcm is None:
+            return
+        
+        try:
+            self._dt_request = gpiod.request_lines(
+                "/dev/gpiochip0",
+                consumer="HX711",
+                config={dt_bcm: gpiod.LineSettings(direction=Direction.INPUT,
+                                                   edge_detection=Edge.FALLING)}
+            )
+            print("HX711: 使用gpiod边沿事件等待数据就绪")
+        except Exception as e:
+            self._dt_request = None
+            print(f"HX711: gpiod边沿事件不可用: {e}，使用轮询")
+    
+    def _wait_ready_edge(self, timeout):
+        """
+        阻塞等待DT下降沿，直到HX711就绪或超时
+        :param timeout: 超时时间(秒)
+        :return: 是否就绪
+        """
+        request = self._dt_request
+        deadline = time.monotonic() + timeout
+        while not self.is_ready():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not request.wait_edge_events(remaining):
+                return False
+            # 取走已到达的事件（包括上次移位读取时DT翻转产生的旧事件）
+            request.read_edge_events()
+        return True
+    
+    def _setup_realtime(self):
+        """
+        实时读取设置：检查内核启动参数是否用isolcpus隔离了REALTIME_CPU，
+        以及是否允许使用SCHED_FIFO（需要root或CAP_SYS_NICE）。
+        这里只记录结果，绑定核心和切换调度只在每次移位读取期间进行，
+        不影响创建HX711的线程及其之后启动的线程
+        """
+        if not hasattr(os, 'sched_setscheduler'):
+            return
+        
+        try:
+            with open("/sys/devices/system/cpu/isolated") as f:
+                isolated = _parse_cpu_list(f.read())
+        except OSError:
+            isolated = set()
+        if REALTIME_CPU in isolated:
+            self._realtime_cpu = REALTIME_CPU
+            print(f"HX711: 移位读取期间将绑定到隔离的CPU {REALTIME_CPU}")
+        
+        try:
+            os.sched_setscheduler(0, os.SCHED_FIFO, os.sched_param(REALTIME_PRIORITY))
+            os.sched_setscheduler(0, os.SCHED_OTHER, os.sched_param(0))
+            self._realtime = True
+        except OSError:
+            print("HX711: 无权限使用SCHED_FIFO实时调度，按普通优先级读取")
+    
+    def _enter_realtime(self):
+        """
+        绑定到隔离的CPU核心并切换到SCHED_FIFO实时调度
+        :return: 绑定前的CPU集合，未绑定时为None
+        """
+        prev_cpus = None
+        if self._realtime_cpu is not None:
+            try:
+                prev_cpus = os.sched_getaffinity(0)
+                os.sched_setaffinity(0, {self._realtime_cpu})
+            except OSError as e:
+                print(f"HX711: 绑定CPU失败: {e}")
+                self._realtime_cpu = None
+                prev_cpus = None
+        if self._realtime:
+            try:
+                os.sched_setscheduler(0, os.SCHED_FIFO, os.sched_param(REALTIME_PRIORITY))
+            except OSError:
+                self._realtime = False
+        return prev_cpus
+    
+    def _leave_realtime(self, prev_cpus=None):
+        """
+        恢复SCHED_OTHER普通调度和原来的CPU集合
+        :param prev_cpus: _enter_realtime返回的CPU集合
+        """
+        if self._realtime:
+            try:
+                os.sched_setscheduler(0, os.SCHED_OTHER, os.sched_param(0))
+            except OSError:
+                pass
+        if prev_cpus is not None:
+            try:
+                os.sched_setaffinity(0, prev_cpus)
+            except OSError:
+                pass
+    
     def read_average(self, times=10):
-        """读取多次取平均值，与Arduino保持一致"""
-        sum_value = 0
+        """
+        读取多次取中值。中值不受单次干扰尖峰（或超时后的模拟值）影响，
+        比算术平均用更少的采样就能得到同样稳定的结果
+        """
+        if NUMPY_AVAILABLE:
+            # 采样写入预分配的数组，最后一次性求中值
+            buf = np.empty(times, dtype=np.int32)
+            for i in range(times):
+                buf[i] = self.read_raw()
+                time.sleep(0.01)  # 与Arduino的延迟保持一致
+            return float(np.median(buf))
+        
+        samples = []
         for i in range(times):
-            sum_value += self.read_raw()
+            samples.append(self.read_raw())
             time.sleep(0.01)  # 与Arduino的延迟保持一致
-        return sum_value / times
+        return float(statistics.median(samples))
     
     def tare(self, times=10):
         """
@@ -234,9 +504,10 @@ class HX711:
         """
         self.offset = self.read_average(times)
         self.is_calibrated = True
+        self._recompute()
         print(f"去皮完成，零点偏移: {self.offset:.0f}")
     
-    def get_weight(self, times=10):
+    def get_weight(self, times=5):
         """
         获取重量值，与Arduino算法完全一致
         :param times: 平均次数
@@ -246,50 +517,136 @@ class HX711:
             print("警告: 传感器未进行去皮校准！")
         
         raw_value = self.read_average(times)
-        weight = (raw_value - self.offset) * self.coefficient
+        weight = raw_value * self._scale + self._bias  # 即 (raw - offset) * coefficient
         
-        # 与Arduino保持一致，允许负值但限制过小的值
-        return max(0, weight) if weight > 0 else 0
+        # 与Arduino保持一致，负值按0处理
+        return weight if weight > 0 else 0.0
+    
+    def _recompute(self):
+        """
+        系数或零点偏移变化后重新计算换算参数，
+        重量 = raw * _scale + _bias，同样适用于NumPy数组的批量换算
+        """
+        self._scale = self.coefficient
+        self._bias = -self.offset * self.coefficient
     
     def set_coefficient(self, coefficient):
         """设置校准系数"""
         self.coefficient = coefficient
+        self._recompute()
         print(f"校准系数已设置为: {coefficient}")
     
     def set_offset(self, offset):
         """手动设置零点偏移"""
         self.offset = offset
         self.is_calibrated = True
+        self._recompute()
         print(f"零点偏移已设置为: {offset}")
     
     def load_calibration(self):
-        """从JSON文件加载校准数据"""
+        """从JSON文件加载校准数据，二进制缓存不比JSON旧时直接读取缓存"""
         try:
-            if os.path.exists(self.calibration_file):
+            try:
+                json_mtime = os.stat(self.calibration_file).st_mtime_ns
+            except FileNotFoundError:
+                print("⚠ 未找到校准数据文件，使用默认参数")
+                print("建议先运行 hx711_calibration.py 进行校准")
+                return
+            
+            cached = self._load_calibration_cache(json_mtime)
+            if cached is not None:
+                coefficient, offset, gain, is_calibrated, timestamp = cached
+            else:
                 with open(self.calibration_file, 'r', encoding='utf-8') as f:
                     calibration_data = json.load(f)
                 
-                self.coefficient = calibration_data.get("coefficient", self.coefficient)
-                self.offset = calibration_data.get("offset", self.offset)
-                self.gain = calibration_data.get("gain", self.gain)
-                self.is_calibrated = calibration_data.get("is_calibrated", True)
-                
-                timestamp = calibration_data.get("timestamp", "未知")
-                print(f"✓ 已加载校准数据 (保存时间: {timestamp})")
-                print(f"  - 校准系数: {self.coefficient:.8f}")
-                print(f"  - 零点偏移: {self.offset:.0f}")
-                print(f"  - 增益: {self.gain}")
-            else:
-                print("⚠ 未找到校准数据文件，使用默认参数")
-                print("建议先运行 hx711_calibration.py 进行校准")
+                coefficient = calibration_data.get("coefficient", self.coefficient)
+                offset = calibration_data.get("offset", self.offset)
+                gain = calibration_data.get("gain", self.gain)
+                is_calibrated = calibration_data.get("is_calibrated", True)
+                timestamp = str(calibration_data.get("timestamp", "未知"))
+                self._save_calibration_cache(coefficient, offset, gain, is_calibrated, timestamp)
+            
+            self.coefficient = coefficient
+            self.offset = offset
+            self.gain = gain
+            self.is_calibrated = is_calibrated
+            self._recompute()
+            
+            print(f"✓ 已加载校准数据 (保存时间: {timestamp})")
+            print(f"  - 校准系数: {self.coefficient:.8f}")
+            print(f"  - 零点偏移: {self.offset:.0f}")
+            print(f"  - 增益: {self.gain}")
         except Exception as e:
             print(f"✗ 加载校准数据失败: {e}，使用默认参数")
     
+    def _load_calibration_cache(self, json_mtime):
+        """
+        映射读取二进制校准缓存
+        :param json_mtime: JSON文件的修改时间(纳秒)，缓存比它旧时视为失效
+        :return: (系数, 零点偏移, 增益, 是否已校准, 保存时间)，缓存无效时返回None
+        """
+        try:
+            with open(self.calibration_cache, 'rb') as f:
+                if os.fstat(f.fileno()).st_mtime_ns < json_mtime:
+                    return None
+                with mmap.mmap(f.fileno(), CALIBRATION_STRUCT.size, access=mmap.ACCESS_READ) as mm:
+                    coefficient, offset, gain, is_calibrated, timestamp = CALIBRATION_STRUCT.unpack_from(mm)
+        except (OSError, ValueError, struct.error):
+            return None
+        timestamp = timestamp.rstrip(b'\0').decode('utf-8', errors='replace')
+        return coefficient, offset, gain, bool(is_calibrated), timestamp
+    
+    def _save_calibration_cache(self, coefficient, offset, gain, is_calibrated, timestamp):
+        """把校准数据写入二进制缓存，先写临时文件再替换，写入失败不影响使用"""
+        try:
+            data = CALIBRATION_STRUCT.pack(float(coefficient), float(offset), int(gain),
+                                           int(bool(is_calibrated)), timestamp.encode('utf-8')[:24])
+            tmp_path = self.calibration_cache + ".tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, self.calibration_cache)
+        except OSError:
+            pass
+    
+    def start_sampling(self, times=5):
+        """
+        启动后台采样线程，持续读取稳定重量并写入latest_weight，
+        显示和其他工作不再等待传感器
+        :param times: 每次读取的采样次数
+        """
+        if self._sampling_thread is not None and self._sampling_thread.is_alive():
+            return
+        self._sampling_stop.clear()
+        self._sampling_thread = threading.Thread(target=self._sampling_loop, args=(times,), daemon=True)
+        self._sampling_thread.start()
+    
+    def _sampling_loop(self, times):
+        """采样线程：浮点数赋值是原子的，读取方无需加锁"""
+        while not self._sampling_stop.is_set():
+            self.latest_weight = self.get_stable_weight(times)
+    
+    def stop_sampling(self):
+        """停止后台采样线程"""
+        self._sampling_stop.set()
+        if self._sampling_thread is not None:
+            self._sampling_thread.join(timeout=2)
+            self._sampling_thread = None
+    
     def cleanup(self):
         """清理GPIO资源"""
+        self.stop_sampling()
         if not self.gpio_initialized:
             return
         
+        self._gpio_regs = None
+        if self._dt_request is not None:
+            try:
+                self._dt_request.release()
+            except Exception:
+                pass
+            self._dt_request = None
+        
         if GPIO_MANAGER_AVAILABLE:
             # 使用GPIO管理器释放引脚
             release_pin(self.SCK, "HX711")
@@ -305,7 +662,7 @@ class HX711:
         
         self.gpio_initialized = False
     
-    def get_stable_weight(self, times=10):
+    def get_stable_weight(self, times=5):
         """
         获取稳定的重量值，快速响应变化
         :param times: 平均次数
@@ -313,20 +670,19 @@ class HX711:
         """
         current_weight = self.get_weight(times)
         
-        # 添加到缓冲区
-        self.weight_buffer.append(current_weight)
-        
-        # 保持缓冲区大小
-        if len(self.weight_buffer) > self.buffer_size:
-            self.weight_buffer.pop(0)
+        # 添加到缓冲区，缓冲区满时deque自动丢弃最旧的值，先从和中减去
+        buffer = self.weight_buffer
+        if len(buffer) == buffer.maxlen:
+            self._weight_sum -= buffer[0]
+        buffer.append(current_weight)
+        self._weight_sum += current_weight
         
         # 如果缓冲区数据不够，直接返回当前值
-        if len(self.weight_buffer) < 2:
+        if len(buffer) < 2:
             return current_weight
         
         # 计算简单移动平均
-        avg_weight = sum(self.weight_buffer) / len(self.weight_buffer)
-        return avg_weight
+        return self._weight_sum / len(buffer)
     
     def simulate_remove_object(self):
         """模拟移除物体，用于测试"""
@@ -368,9 +724,10 @@ def start_measurement():
         print("按 Ctrl+C 停止测量")
         print("=" * 30)
         
+        # 采样在后台线程中进行，显示循环只读取最新值
+        scale.start_sampling(times=5)
         while True:
-            weight = scale.get_stable_weight(times=5)
-            print(f"重量: {weight:8.2f} g", end='\r')
+            print(f"重量: {scale.latest_weight:8.2f} g", end='\r')
             time.sleep(0.3)  # 快速响应
             
     except KeyboardInterrupt:
@@ -2,14 +2,30 @@
 1602 I2C LCD显示屏驱动模块
 """
 
-import smbus
 import time
+import functools
+
+LCD_COLUMNS = 16  # 每行可见字符数
+
+# HD44780指令执行时间：清屏(0x01)和光标归位(0x02)约1.52ms，其余指令和数据写入约37us
+_EXEC_DELAY = {0x01: 0.0016, 0x02: 0.0016}
+_DEFAULT_DELAY = 0.00005
 
 class LCD1602_I2C:
     def __init__(self, addr=0x27, bus=1):
         self.addr = addr
+        # 屏幕上当前显示内容的缓存，None表示未知，print只写入发生变化的字符
+        self._frame = [[None] * LCD_COLUMNS, [None] * LCD_COLUMNS]
         try:
-            self.bus = smbus.SMBus(bus)
+            # 使用时才导入I2C库，没有LCD的环境也能导入本模块（如只用format_weight）。
+            # smbus2可用时，一个字节的4次半字节写入合并为一次I2C传输
+            try:
+                from smbus2 import SMBus, i2c_msg
+                self._i2c_msg = i2c_msg
+            except ImportError:
+                from smbus import SMBus
+                self._i2c_msg = None
+            self.bus = SMBus(bus)
             self.init_lcd()
             self.set_brightness(True)
             print(f"✓ LCD初始化成功，I2C地址：0x{addr:02X}")
@@ -20,41 +36,45 @@ class LCD1602_I2C:
     def write_byte(self, data):
         self.bus.write_byte(self.addr, data)
     
-    def write_command_with_backlight(self, cmd, backlight=True):
+    def _write_block(self, data):
+        """连续写入多个字节：smbus2一次传输完成，否则逐字节写入"""
+        if self._i2c_msg is not None:
+            self.bus.i2c_rdwr(self._i2c_msg.write(self.addr, data))
+        else:
+            for b in data:
+                self.bus.write_byte(self.addr, b)
+    
+    def _send(self, value, rs, backlight, delay=_DEFAULT_DELAY):
+        """
+        按4位模式发送一个字节：高低半字节各用E引脚(0x04)的一个高-低脉冲锁存
+        :param rs: 0x00表示命令，0x01表示数据
+        :param delay: 发送后等待LCD执行完毕的时间(秒)
+        """
         backlight_bit = 0x08 if backlight else 0x00
-        buf = cmd & 0xF0
-        buf |= 0x04 | backlight_bit
-        self.write_byte(buf)
-        time.sleep(0.002)
-        buf &= 0xFB
-        buf |= backlight_bit
-        self.write_byte(buf)
-        
-        buf = (cmd & 0x0F) << 4
-        buf |= 0x04 | backlight_bit
-        self.write_byte(buf)
-        time.sleep(0.002)
-        buf &= 0xFB
-        buf |= backlight_bit
-        self.write_byte(buf)
+        high = (value & 0xF0) | rs | backlight_bit
+        low = ((value & 0x0F) << 4) | rs | backlight_bit
+        self._write_block([high | 0x04, high, low | 0x04, low])
+        time.sleep(delay)
     
-    def write_data_with_backlight(self, data, backlight=True):
+    def _encode_data(self, text, backlight=True):
+        """
+        把一串字符预先编码为连续的写入序列，每个字符4个字节，可一次传输
+        :return: bytes
+        """
         backlight_bit = 0x08 if backlight else 0x00
-        buf = data & 0xF0
-        buf |= 0x05 | backlight_bit
-        self.write_byte(buf)
-        time.sleep(0.002)
-        buf &= 0xFB
-        buf |= backlight_bit
-        self.write_byte(buf)
-        
-        buf = (data & 0x0F) << 4
-        buf |= 0x05 | backlight_bit
-        self.write_byte(buf)
-        time.sleep(0.002)
-        buf &= 0xFB
-        buf |= backlight_bit
-        self.write_byte(buf)
+        buf = bytearray()
+        for char in text:
+            value = ord(char) & 0xFF
+            high = (value & 0xF0) | 0x01 | backlight_bit
+            low = ((value & 0x0F) << 4) | 0x01 | backlight_bit
+            buf += bytes((high | 0x04, high, low | 0x04, low))
+        return bytes(buf)
+    
+    def write_command_with_backlight(self, cmd, backlight=True):
+        self._send(cmd, 0x00, backlight, _EXEC_DELAY.get(cmd, _DEFAULT_DELAY))
+    
+    def write_data_with_backlight(self, data, backlight=True):
+        self._send(data, 0x01, backlight)
     
     def init_lcd(self):
         self.write_byte(0x08)
@@ -71,6 +91,7 @@ class LCD1602_I2C:
         time.sleep(0.005)
         self.write_command_with_backlight(0x01)
         time.sleep(0.5)
+        self._reset_frame()
     
     def set_brightness(self, bright=True):
         if bright:
@@ -78,8 +99,12 @@ class LCD1602_I2C:
             self.write_byte(0x0F)
     
     def clear(self):
-        self.write_command_with_backlight(0x01)
-        time.sleep(0.002)
+        self.write_command_with_backlight(0x01)  # 命令本身已等待清屏完成
+        self._reset_frame()
+    
+    def _reset_frame(self):
+        """清屏后屏幕上全是空格"""
+        self._frame = [[' '] * LCD_COLUMNS, [' '] * LCD_COLUMNS]
     
     def set_cursor(self, line, column):
         if line == 0:
@@ -89,22 +114,75 @@ class LCD1602_I2C:
         self.write_command_with_backlight(addr)
     
     def print(self, text, line=0, column=0):
+        """
+        在指定位置显示文字，只写入与屏幕缓存不同的字符。
+        每段连续变化的字符设置一次光标，整段预先编码后一次传输
+        """
+        cached = self._frame[0 if line == 0 else 1]
+        run_start = None  # 当前连续变化段的起始列
+        run = []
+        for i, char in enumerate(str(text)):
+            col = column + i
+            if col < LCD_COLUMNS and cached[col] == char:
+                if run:
+                    self._write_run(line, run_start, run)
+                    run = []
+                continue
+            if not run:
+                run_start = col
+            run.append(char)
+        if run:
+            self._write_run(line, run_start, run)
+    
+    def _write_run(self, line, column, chars):
+        """
+        从指定位置连续写入一段字符，写入成功后才更新屏幕缓存，
+        I2C出错时缓存保持原样，下次刷新会重新写入这些字符
+        """
         self.set_cursor(line, column)
-        for char in str(text):
-            self.write_data_with_backlight(ord(char), True)
+        self._write_block(self._encode_data(chars))
+        time.sleep(_DEFAULT_DELAY)  # 最后一个字符的执行时间
+        cached = self._frame[0 if line == 0 else 1]
+        for col, char in enumerate(chars, column):
+            if col < LCD_COLUMNS:
+                cached[col] = char
+    
+    def render(self, lines):
+        """
+        刷新整屏内容，每行补齐空格到16个字符，代替clear()加print()，
+        内容不变的字符不会重新写入
+        :param lines: 两行文字
+        """
+        for line, text in enumerate(lines[:2]):
+            self.print(str(text)[:LCD_COLUMNS].ljust(LCD_COLUMNS), line, 0)
 
 def format_weight(weight, unit="g"):
-    """格式化重量显示"""
+    """
+    格式化重量显示。先按原有规则选出要显示的数值（与缓存前的输出完全一致），
+    再以该数值查缓存，读数稳定时不再重复格式化
+    """
     if unit == "kg":
         weight_kg = weight / 1000
         if weight_kg < 0.01:
             return "0.00kg"
-        else:
-            return f"{weight_kg:.2f}kg"
+        # round(x, 2)与"%.2f"的舍入结果相同
+        return _format_weight_cached(round(weight_kg, 2), "kg")
+    if weight < 0.1:
+        return "0.0g"
+    elif weight < 10:
+        return _format_weight_cached(round(weight, 1), "g1")
     else:
-        if weight < 0.1:
-            return "0.0g"
-        elif weight < 10:
-            return f"{weight:.1f}g"
-        else:
-            return f"{int(weight)}g"
+        return _format_weight_cached(int(weight), "g")
+
+@functools.lru_cache(maxsize=4096)
+def _format_weight_cached(value, kind):
+    """
+    :param value: 已舍入到显示精度的数值
+    :param kind: "kg"两位小数，"g1"一位小数的克，"g"整数克
+    """
+    if kind == "kg":
+        return f"{value:.2f}kg"
+    elif kind == "g1":
+        return f"{value:.1f}g"
+    else:
+        return f"{value}g"
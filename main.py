@@ -8,12 +8,16 @@ import time
 import threading
 import json
 import os
-from datetime import datetime
+import sys
+import copy
+import queue
+import logging
+import logging.handlers
 from hx711 import HX711
 from lcd_display import LCD1602_I2C, format_weight
 
 # 导入GPIO统一管理器
-from gpio_manager import gpio_manager, init_gpio, allocate_pin, release_pin, output, input_pin, GPIO_AVAILABLE, GPIO
+from gpio_manager import gpio_manager, init_gpio, allocate_pin, release_pin, output, GPIO_AVAILABLE, GPIO
 
 # 导入蜂鸣器模块
 try:
@@ -31,6 +35,27 @@ except ImportError:
     CAMERA_AVAILABLE = False
     print("警告: 无法导入摄像头模块，人脸检测功能将被禁用")
 
+CONFIG_FILE = "hx711_calibration.json"
+
+DEBUG_LED = False  # 打印每次LED闪烁的调试信息
+
+STABILITY_INDICATORS = ("○", "●")  # 按是否稳定索引
+
+# 工作线程和LED的诊断信息经队列交给后台线程输出，热路径不等待控制台刷新
+_log_queue = queue.SimpleQueue()
+logger = logging.getLogger("weight_monitor")
+logger.setLevel(logging.DEBUG if DEBUG_LED else logging.INFO)
+logger.addHandler(logging.handlers.QueueHandler(_log_queue))
+logger.propagate = False
+# 输出线程在main()中启动和停止，导入模块时不启动线程
+_log_listener = logging.handlers.QueueListener(_log_queue, logging.StreamHandler(sys.stdout))
+
+# 人脸检测线程绑定的CPU核心，避开HX711实时读取使用的核心(hx711.REALTIME_CPU)
+FACE_DETECTION_CPU = 2
+
+# 已解析配置缓存: 路径 -> (mtime_ns, 合并默认值后的配置)
+_CONFIG_CACHE = {}
+
 class WeightMonitor:
     def __init__(self):
         self.config = self.load_config()
@@ -40,17 +65,25 @@ class WeightMonitor:
         self.camera = None
         self.face_detection_active = False
         self.face_detection_thread = None
-        self.beep_queue = []  # 改为LED队列
-        self.beep_lock = threading.Lock()  # 改为LED锁
-        self.buzzer_method = None
+        self.beep_queue = queue.SimpleQueue()  # LED请求队列，线程安全
+        self.stop_event = threading.Event()  # 程序退出信号，工作线程据此立即退出
+        self.queue_ready = threading.Event()  # LED队列有新请求时唤醒主线程
         self.led_pin = 19  # LED引脚号（BCM编号）
         self.led_initialized = False
+        self._led_on = False  # LED当前输出状态，输出引脚不回读
+        self._flash_timer = None  # 下一次LED翻转的定时器
+        self._flash_lock = threading.Lock()  # 保护下面的闪烁状态，定时器线程和主线程共用
+        self._flashing = False  # 是否正在闪烁，期间的新警报直接丢弃
+        self._flash_gen = 0  # 闪烁序号，结束或取消时递增，使已排队的定时器失效
+        self.button_pin = None  # 停止按钮引脚（BOARD编号）
         self.gpio_manager_initialized = False  # GPIO管理器初始化状态
+        self.lcd = None
+        self._lcd_lines = ["", ""]  # 上次写入LCD的两行内容
         # 不在初始化时就设置LED，等待其他硬件初始化完成后再设置
         
     def load_config(self):
         """加载配置文件"""
-        config_file = "hx711_calibration.json"
+        config_file = CONFIG_FILE
         default_config = {
             "standard_weight": 200.0,
             "weight_tolerance": 10.0,
@@ -59,24 +92,47 @@ class WeightMonitor:
             "enable_face_detection": True,
             "buzzer_pin": 18,
             "camera_index": 0,
-            "led_pin": 19  # 添加LED引脚配置
+            "led_pin": 19,  # 添加LED引脚配置
+            "stop_button_pin": None  # 停止按钮引脚(BCM)，None表示未接按钮
         }
         
         try:
-            if os.path.exists(config_file):
-                with open(config_file, 'r', encoding='utf-8') as f:
-                    config = json.load(f)
-                # 合并默认配置
-                for key, value in default_config.items():
-                    if key not in config:
-                        config[key] = value
-                return config
-            else:
-                return default_config
+            # 直接打开，文件不存在时走默认配置，省去一次exists检查
+            with open(config_file, 'r', encoding='utf-8') as f:
+                mtime_ns = os.fstat(f.fileno()).st_mtime_ns
+                cached = _CONFIG_CACHE.get(config_file)
+                if cached and cached[0] == mtime_ns:
+                    # 文件未变化，直接复用已解析的配置
+                    return copy.deepcopy(cached[1])
+                config = json.loads(f.read())
+            # 合并默认配置
+            for key, value in default_config.items():
+                if key not in config:
+                    config[key] = value
+            _CONFIG_CACHE[config_file] = (mtime_ns, config)
+            return copy.deepcopy(config)
+        except FileNotFoundError:
+            return default_config
         except Exception as e:
             print(f"加载配置失败: {e}，使用默认配置")
             return default_config
     
+    def _lcd_update(self, line0, line1):
+        """
+        刷新LCD两行内容，与上次相同时不产生任何I2C通信，
+        否则交给render()只写入变化的字符
+        :param line0: 第一行文字
+        :param line1: 第二行文字
+        """
+        if self.lcd is None:
+            return
+        line0 = str(line0)[:16].ljust(16)
+        line1 = str(line1)[:16].ljust(16)
+        if line0 == self._lcd_lines[0] and line1 == self._lcd_lines[1]:
+            return
+        self.lcd.render([line0, line1])
+        self._lcd_lines = [line0, line1]
+    
     def start_music(self):
         """启动音乐播放"""
         if not BUZZER_AVAILABLE or not self.config.get("enable_music", True):
@@ -100,13 +156,13 @@ class WeightMonitor:
             
             def play_music():
                 try:
-                    print("开始播放Bad Apple音乐...")
+                    logger.info("开始播放Bad Apple音乐...")
                     self.buzzer.play_melody()
                 except Exception as e:
-                    print(f"音乐播放出错: {e}")
+                    logger.info(f"音乐播放出错: {e}")
                 finally:
                     self.music_playing = False
-                    print("音乐播放结束")
+                    logger.info("音乐播放结束")
             
             self.music_thread = threading.Thread(target=play_music, daemon=True)
             self.music_thread.start()
@@ -145,154 +201,31 @@ class WeightMonitor:
     def led_alert(self, duration=2):
         """LED警报 - 点亮指定时间"""
         if not GPIO_AVAILABLE or not self.led_initialized:
-            print(f"LED警报: 点亮{duration}秒 (模拟)")
-            return
-        
-        # 检查是否在主线程中
-        if threading.current_thread() != threading.main_thread():
-            # 如果不在主线程，将请求添加到队列
-            with self.beep_lock:
-                self.beep_queue.append(duration)
-            print(f"LED警报请求已加入队列: 点亮{duration}秒")
+            logger.info(f"LED警报: 点亮{duration}秒 (模拟)")
             return
         
-        # 在主线程中直接执行
-        self._execute_led_sync(duration)
-    
-    def _execute_led_sync(self, duration):
-        """在主线程中同步执行LED操作"""
-        try:
-            if not self.led_initialized:
-                print("LED未初始化")
-                return
-            
-            print(f"LED警报: 点亮{duration}秒")
-            
-            # 使用GPIO管理器进行输出
-            current_state = input_pin(self.led_pin)
-            print(f"LED当前状态: {'HIGH' if current_state else 'LOW'}")
-            
-            # 点亮LED
-            if output(self.led_pin, GPIO.HIGH):
-                print("💡 LED已点亮")
-                
-                # 验证LED是否真的点亮了
-                new_state = input_pin(self.led_pin)
-                print(f"LED设置后状态: {'HIGH' if new_state else 'LOW'}")
-                if not new_state:
-                    print("警告: LED可能没有正确点亮")
-                
-                # 保持点亮指定时间
-                print(f"保持点亮{duration}秒...")
-                time.sleep(duration)
-                
-                # 关闭LED
-                if output(self.led_pin, GPIO.LOW):
-                    print("💡 LED已关闭")
-                    
-                    # 验证LED是否真的关闭了
-                    final_state = input_pin(self.led_pin)
-                    print(f"LED关闭后状态: {'HIGH' if final_state else 'LOW'}")
-            else:
-                print("LED输出失败，使用模拟模式")
-                self._simulate_led_alert(duration)
-            
-        except Exception as e:
-            print(f"LED警报失败: {e}")
-            self._simulate_led_alert(duration)
+        # 请求统一加入队列，由主线程处理
+        self.beep_queue.put(duration)
+        self.queue_ready.set()
+        logger.info(f"LED警报请求已加入队列: 点亮{duration}秒")
     
     def _simulate_led_alert(self, duration):
         """模拟LED警报"""
-        print(f"💡 模拟LED警报: 闪烁{duration}次")
+        logger.info(f"💡 模拟LED警报: 闪烁{duration}次")
         for i in range(int(duration)):
-            print(f"💡 闪烁 {i+1}/{int(duration)}")
+            logger.info(f"💡 闪烁 {i+1}/{int(duration)}")
             time.sleep(0.5)
     
     def process_beep_queue(self):
         """处理LED队列（在主线程中调用）"""
-        with self.beep_lock:
-            while self.beep_queue:
-                duration = self.beep_queue.pop(0)
-                # 直接在主线程中执行LED操作
-                self._execute_led_sync(duration)
-    
-    def _test_buzzer_methods(self, buzzer):
-        """测试蜂鸣器可用的方法"""
-        if self.buzzer_method:
-            return self.buzzer_method
-            
-        test_methods = [
-            ('beep', lambda b, duration: b.beep(duration)),
-            ('buzz', lambda b, duration: b.buzz(duration)),
-            ('play_beep', lambda b, duration: b.play_beep(duration)),
-            ('simple_beep', lambda b, duration: b.simple_beep(duration)),
-            ('play_tone', lambda b, duration: b.play_tone(1000, duration)),
-            ('tone', lambda b, duration: b.tone(1000, duration))
-        ]
-        
-        for method_name, method_func in test_methods:
-            if hasattr(buzzer, method_name):
-                try:
-                    # 测试调用
-                    method_func(buzzer, 0.1)
-                    self.buzzer_method = (method_name, method_func)
-                    print(f"找到可用的蜂鸣器方法: {method_name}")
-                    return self.buzzer_method
-                except Exception as e:
-                    print(f"方法 {method_name} 测试失败: {e}")
-                    continue
-        
-        # 如果都不行，返回None
-        methods = [method for method in dir(buzzer) if not method.startswith('_') and callable(getattr(buzzer, method))]
-        print(f"无法找到可用的蜂鸣器方法。可用方法: {methods}")
-        return None
+        while True:
+            try:
+                duration = self.beep_queue.get_nowait()
+            except queue.Empty:
+                break
+            # 直接在主线程中执行LED操作
+            self._execute_led_sync(duration)
     
-    def _execute_beep_sync(self, count):
-        """在主线程中同步执行蜂鸣器操作"""
-        try:
-            buzzer_pin = self.config.get("buzzer_pin", 18)
-            temp_buzzer = BadAppleBuzzer(beep_pin=buzzer_pin)
-            
-            if not temp_buzzer.gpio_initialized:
-                print("蜂鸣器GPIO初始化失败")
-                return
-            
-            print(f"蜂鸣器警报: 响{count}声")
-            
-            # 测试并获取可用的蜂鸣器方法
-            buzzer_method = self._test_buzzer_methods(temp_buzzer)
-            
-            if buzzer_method:
-                method_name, method_func = buzzer_method
-                for i in range(count):
-                    try:
-                        method_func(temp_buzzer, 0.2)
-                        if i < count - 1:
-                            time.sleep(0.3)
-                    except Exception as e:
-                        print(f"蜂鸣器响声失败: {e}")
-                        print(f"BEEP {i+1}/{count} (模拟)")
-                        if i < count - 1:
-                            time.sleep(0.3)
-            else:
-                # 完全模拟
-                print("使用完全模拟的蜂鸣器警报")
-                for i in range(count):
-                    print(f"🔊 BEEP {i+1}!")
-                    if i < count - 1:
-                        time.sleep(0.3)
-            
-            temp_buzzer.cleanup()
-            
-        except Exception as e:
-            print(f"蜂鸣器警报失败: {e}")
-            # 完全模拟的备用方案
-            print(f"使用模拟蜂鸣器警报: 响{count}声")
-            for i in range(count):
-                print(f"🔊 BEEP {i+1}!")
-                if i < count - 1:
-                    time.sleep(0.3)
-
     def init_camera(self):
         """初始化摄像头"""
         if not CAMERA_AVAILABLE or not self.config.get("enable_face_detection", True):
@@ -336,62 +269,89 @@ class WeightMonitor:
         self.face_detection_active = True
         
         def face_detection_worker():
-            print("人脸检测线程已启动")
-            frame_count = 0
-            detection_interval = 30  # 增加检测间隔，减少误触发
+            logger.info("人脸检测线程已启动")
+            self._pin_face_detection_thread()
+            detection_period = 1.0  # 检测间隔(秒)，减少误触发
+            next_detect_at = time.monotonic()
             consecutive_failures = 0
             max_failures = 10
-            last_face_detection = 0  # 上次检测到人脸的时间
             cooldown_period = 5  # 冷却期5秒，避免频繁触发
+            last_face_detection = -cooldown_period - 1  # 上次检测到人脸的时间(monotonic)
             
             try:
-                while self.face_detection_active:
+                while self.face_detection_active and not self.stop_event.is_set():
                     try:
-                        ret, frame = self.camera.cap.read()
+                        if time.monotonic() < next_detect_at:
+                            # 未到检测时间只抓取帧以清空摄像头缓冲，不解码
+                            self.camera.cap.grab()
+                            self.stop_event.wait(0.03)
+                            continue
+                        
+                        # 到检测时间才解码当前帧
+                        ret, frame = self.camera.cap.retrieve()
+                        if not ret or frame is None:
+                            # 刚启动时还没有抓取过帧，先抓取再解码
+                            ret, frame = self.camera.cap.read()
                         if not ret or frame is None:
                             consecutive_failures += 1
                             if consecutive_failures >= max_failures:
-                                print("连续读取摄像头失败过多，退出人脸检测")
+                                logger.info("连续读取摄像头失败过多，退出人脸检测")
                                 break
                             if consecutive_failures <= 3:
-                                print(f"无法读取摄像头画面 (失败次数: {consecutive_failures})")
-                            time.sleep(1)
+                                logger.info(f"无法读取摄像头画面 (失败次数: {consecutive_failures})")
+                            self.stop_event.wait(1)
                             continue
                         
                         consecutive_failures = 0
+                        next_detect_at = time.monotonic() + detection_period
                         
-                        # 每隔几帧进行一次人脸检测
-                        if frame_count % detection_interval == 0:
-                            faces = self.camera.detect_faces(frame)
-                            
-                            if len(faces) > 0:
-                                current_time = time.time()
-                                # 检查冷却期
-                                if current_time - last_face_detection > cooldown_period:
-                                    print(f"检测到人脸! 触发LED警报 (检测到{len(faces)}个人脸)")
-                                    last_face_detection = current_time
-                                    # 将LED请求添加到队列
-                                    self.led_alert(3)  # LED点亮3秒
-                                else:
-                                    print(f"检测到人脸但在冷却期内，跳过触发")
+                        faces = self.camera.detect_faces(frame)
                         
-                        frame_count += 1
-                        time.sleep(0.1)
+                        if len(faces) > 0:
+                            current_time = time.monotonic()
+                            # 检查冷却期
+                            if current_time - last_face_detection > cooldown_period:
+                                logger.info(f"检测到人脸! 触发LED警报 (检测到{len(faces)}个人脸)")
+                                last_face_detection = current_time
+                                # 将LED请求添加到队列
+                                self.led_alert(3)  # LED点亮3秒
+                            else:
+                                logger.info(f"检测到人脸但在冷却期内，跳过触发")
                         
                     except Exception as e:
-                        print(f"人脸检测帧处理出错: {e}")
-                        time.sleep(1)
+                        logger.info(f"人脸检测帧处理出错: {e}")
+                        self.stop_event.wait(1)
                         continue
                     
             except Exception as e:
-                print(f"人脸检测出错: {e}")
+                logger.info(f"人脸检测出错: {e}")
             finally:
                 self.face_detection_active = False
-                print("人脸检测线程已退出")
+                logger.info("人脸检测线程已退出")
         
         self.face_detection_thread = threading.Thread(target=face_detection_worker, daemon=True)
         self.face_detection_thread.start()
     
+    def _pin_face_detection_thread(self):
+        """把当前线程（人脸检测）绑定到单独的CPU核心，减少与称重读取争抢和缓存迁移"""
+        if not hasattr(os, 'sched_setaffinity'):
+            return
+        try:
+            allowed = os.sched_getaffinity(0)
+            if FACE_DETECTION_CPU not in allowed:
+                # 继承的CPU集合可能已被缩小，按系统(init进程)允许的集合判断
+                try:
+                    allowed = os.sched_getaffinity(1)
+                except OSError:
+                    pass
+            if FACE_DETECTION_CPU not in allowed:
+                logger.info(f"CPU {FACE_DETECTION_CPU}不可用(允许的CPU: {sorted(allowed)})，人脸检测线程不绑定核心")
+                return
+            os.sched_setaffinity(0, {FACE_DETECTION_CPU})
+            logger.info(f"人脸检测线程已绑定到CPU {FACE_DETECTION_CPU}")
+        except OSError as e:
+            logger.info(f"人脸检测线程绑定CPU失败: {e}")
+    
     def stop_face_detection(self):
         """停止人脸检测"""
         if self.face_detection_active:
@@ -415,10 +375,19 @@ class WeightMonitor:
     
     def cleanup_led(self):
         """清理LED资源 - 使用GPIO管理器"""
+        self._finish_flash()
+        if self.button_pin is not None:
+            try:
+                GPIO.remove_event_detect(self.button_pin)
+                release_pin(self.button_pin, "WeightMonitor")
+            except Exception as e:
+                print(f"停止按钮清理失败: {e}")
+            self.button_pin = None
         if self.led_initialized and GPIO_AVAILABLE:
             try:
                 # 确保LED关闭
                 output(self.led_pin, GPIO.LOW)
+                self._led_on = False
                 print("LED已关闭")
                 
                 # 释放LED引脚
@@ -439,6 +408,8 @@ class WeightMonitor:
             print("GPIO管理器未初始化，无法设置LED")
             return
         
+        self._setup_stop_button()
+        
         # 获取配置的LED引脚
         config_led_pin = self.config.get("led_pin", 19)
         
@@ -458,6 +429,7 @@ class WeightMonitor:
                 
                 # 确保LED初始状态为关闭
                 output(self.led_pin, GPIO.LOW)
+                self._led_on = False
                 
                 print(f"✓ LED成功初始化在引脚{board_pin} (对应BCM GPIO{config_led_pin})")
                 
@@ -472,6 +444,31 @@ class WeightMonitor:
             print(f"LED初始化失败: {e}")
             self.led_initialized = False
     
+    def _setup_stop_button(self):
+        """配置停止按钮，按下时由GPIO边沿中断回调，无需轮询"""
+        button_bcm = self.config.get("stop_button_pin")
+        if button_bcm is None:
+            return
+        
+        board_pin = gpio_manager.convert_pin(button_bcm, GPIO.BCM, GPIO.BOARD)
+        if board_pin is None:
+            print(f"无效的按钮引脚配置: GPIO{button_bcm} (BCM)")
+            return
+        
+        try:
+            if allocate_pin(board_pin, "WeightMonitor", GPIO.IN, pull_up_down=GPIO.PUD_UP):
+                GPIO.add_event_detect(board_pin, GPIO.FALLING, callback=self._on_button, bouncetime=200)
+                self.button_pin = board_pin
+                print(f"✓ 停止按钮已配置在引脚{board_pin} (对应BCM GPIO{button_bcm})")
+        except Exception as e:
+            print(f"停止按钮配置失败: {e}")
+    
+    def _on_button(self, channel):
+        """停止按钮回调（在GPIO事件线程中执行）"""
+        logger.info(f"\n停止按钮被按下 (引脚{channel})")
+        self.stop_event.set()
+        self.queue_ready.set()  # 立即唤醒主循环
+    
     def _auto_find_led_pin(self):
         """自动寻找可用的LED引脚"""
         print("正在自动寻找可用的LED引脚...")
@@ -490,6 +487,7 @@ class WeightMonitor:
                 self.led_pin = pin
                 self.led_initialized = True
                 output(self.led_pin, GPIO.LOW)
+                self._led_on = False
                 
                 # 更新配置文件
                 bcm_pin = gpio_manager.convert_pin(pin, GPIO.BOARD, GPIO.BCM)
@@ -512,9 +510,9 @@ class WeightMonitor:
         try:
             # 快速闪烁测试
             for i in range(3):
-                output(self.led_pin, GPIO.HIGH)
+                self._led_set(True)
                 time.sleep(0.2)
-                output(self.led_pin, GPIO.LOW)
+                self._led_set(False)
                 time.sleep(0.2)
             print("✓ LED功能测试通过")
         except Exception as e:
@@ -523,8 +521,12 @@ class WeightMonitor:
     def _save_config(self):
         """保存配置到文件"""
         try:
-            with open("hx711_calibration.json", 'w', encoding='utf-8') as f:
+            with open(CONFIG_FILE, 'w', encoding='utf-8') as f:
                 json.dump(self.config, f, indent=4, ensure_ascii=False)
+                f.flush()
+                # 用写入后的mtime更新缓存，下次加载无需重新解析
+                mtime_ns = os.fstat(f.fileno()).st_mtime_ns
+            _CONFIG_CACHE[CONFIG_FILE] = (mtime_ns, copy.deepcopy(self.config))
         except Exception as e:
             print(f"保存配置失败: {e}")
     def _diagnose_hardware_issue(self):
@@ -570,31 +572,82 @@ class WeightMonitor:
     def _execute_led_sync(self, duration):
         """在主线程中同步执行LED操作 - 使用GPIO管理器的简化版本"""
         if not self.led_initialized:
-            print(f"LED警报: 点亮{duration}秒 (模拟 - LED未初始化)")
+            logger.info(f"LED警报: 点亮{duration}秒 (模拟 - LED未初始化)")
             return
         
+        with self._flash_lock:
+            if self._flashing:
+                logger.info("LED正在闪烁，忽略本次警报")
+                return
+            self._flashing = True
+            self._flash_gen += 1
+            gen = self._flash_gen
+        
         try:
-            print(f"💡 LED警报: 闪烁{duration}次 (引脚{self.led_pin})")
+            logger.info(f"💡 LED警报: 闪烁{duration}次 (引脚{self.led_pin})")
             
-            # 执行更明显的闪烁模式
+            # 执行更明显的闪烁模式，由定时器翻转LED，主循环不被阻塞
             flash_count = max(3, int(duration))  # 至少闪烁3次
-            
-            for i in range(flash_count):
-                if output(self.led_pin, GPIO.HIGH):
-                    time.sleep(0.5)  # 点亮0.5秒
-                    output(self.led_pin, GPIO.LOW)
-                    if i < flash_count - 1:  # 最后一次不需要间隔
-                        time.sleep(0.5)  # 熄灭0.5秒
-                else:
-                    print(f"LED输出失败，第{i+1}次闪烁")
-                    time.sleep(0.5)
-            
-            print("💡 LED闪烁完成")
+            self._schedule_flash(gen, 2 * flash_count - 1, True)
             
         except Exception as e:
-            print(f"LED操作失败: {e}")
+            logger.info(f"LED操作失败: {e}")
+            self._finish_flash()
             self._simulate_led_alert(duration)
 
+    def _led_set(self, on):
+        """
+        设置LED状态，与记录的状态相同时不访问GPIO
+        :param on: True点亮，False熄灭
+        :return: 是否设置成功
+        """
+        if self._led_on == on:
+            return True
+        ok = output(self.led_pin, GPIO.HIGH if on else GPIO.LOW)
+        if ok:
+            self._led_on = on
+        return ok
+    
+    def _schedule_flash(self, gen, remaining, on):
+        """
+        设置LED状态，并安排0.5秒后的下一次翻转。
+        整个过程持有_flash_lock，cleanup_led取消后不会再有翻转写入引脚
+        :param gen: 本次闪烁的序号，与当前序号不同说明已被取消
+        :param remaining: 剩余翻转次数
+        :param on: 本次是否点亮
+        """
+        with self._flash_lock:
+            if gen != self._flash_gen:
+                return
+            if not self.led_initialized:
+                self._end_flash_locked()
+                return
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"LED{'点亮' if on else '熄灭'}，剩余{remaining}次翻转")
+            if not self._led_set(on):
+                logger.info("LED输出失败")
+            if remaining > 0 and not self.stop_event.is_set():
+                timer = threading.Timer(0.5, self._schedule_flash, args=(gen, remaining - 1, not on))
+                timer.daemon = True
+                self._flash_timer = timer
+                timer.start()
+            else:
+                self._end_flash_locked()
+                logger.info("💡 LED闪烁完成")
+    
+    def _end_flash_locked(self):
+        """结束当前闪烁并使已排队的定时器失效（调用方需持有_flash_lock）"""
+        self._flash_gen += 1
+        self._flashing = False
+        if self._flash_timer is not None:
+            self._flash_timer.cancel()
+            self._flash_timer = None
+    
+    def _finish_flash(self):
+        """结束或取消闪烁，允许接受新的警报，可重复调用"""
+        with self._flash_lock:
+            self._end_flash_locked()
+    
     def init_gpio_system(self):
         """统一初始化GPIO系统"""
         if self.gpio_manager_initialized:
@@ -618,7 +671,15 @@ class WeightMonitor:
         return True
 
 def main():
-    """主程序"""
+    """主程序：启动日志输出线程，无论从哪里返回都输出队列中剩余的日志"""
+    _log_listener.start()
+    try:
+        _run()
+    finally:
+        _log_listener.stop()
+
+def _run():
+    """初始化硬件并运行测量循环"""
     print("=" * 50)
     print("    HX711 + LCD1602 称重显示系统")
     print("    带重量监控、音乐提醒和人脸检测LED警报功能")
@@ -648,6 +709,7 @@ def main():
         
         # 2. 初始化其他硬件（它们会使用GPIO管理器）
         lcd = LCD1602_I2C()
+        monitor.lcd = lcd
         scale = HX711()
         
         # 3. 等待其他硬件稳定后再初始化LED
@@ -689,9 +751,7 @@ def main():
         # 5. 初始化摄像头
         camera_initialized = monitor.init_camera()
         
-        lcd.clear()
-        lcd.print("System Ready", 0, 0)
-        lcd.print("Weight Monitor", 1, 0)
+        monitor._lcd_update("System Ready", "Weight Monitor")
         time.sleep(2)
         
     except Exception as e:
@@ -703,6 +763,8 @@ def main():
     unit = "g"
     stable_count = 0
     last_weight = 0
+    samples = 5  # 每次测量的采样次数
+    steady_count = 0  # 重量变化小于0.5g的连续次数
     check_completed = False
     start_time = time.time()
     
@@ -712,44 +774,68 @@ def main():
             monitor.start_face_detection()
         
         # 去皮操作
-        lcd.clear()
-        lcd.print("Taring...", 0, 0)
-        lcd.print("Remove items", 1, 0)
-        
         for i in range(3, 0, -1):
-            lcd.print(f"Wait {i}s", 1, 10)
+            monitor._lcd_update("Taring...", f"Remove items {i}s")
             time.sleep(1)
         
-        scale.tare(times=10)
+        # 物品移开后在后台去皮，同时显示"Starting..."画面，两者重叠进行
+        tare_errors = []  # 后台去皮抛出的异常，join后在主线程重新抛出
+        
+        def run_tare():
+            try:
+                scale.tare(times=10)
+            except Exception as e:
+                tare_errors.append(e)
         
-        lcd.clear()
-        lcd.print("Tare Complete!", 0, 0)
+        tare_thread = threading.Thread(target=run_tare, daemon=True)
+        tare_thread.start()
+        monitor._lcd_update("Taring...", "Starting...")
         time.sleep(1)
+        tare_thread.join()
+        if tare_errors:
+            raise tare_errors[0]
         
-        # 显示重量检测倒计时
-        lcd.clear()
-        lcd.print("Weight Check", 0, 0)
-        lcd.print("Starting...", 1, 0)
+        monitor._lcd_update("Tare Complete!", "Weight Check")
         time.sleep(1)
         
         print(f"\n开始重量检测... (目标: {monitor.config['standard_weight']}±{monitor.config['weight_tolerance']}g)")
         print("按 Ctrl+C 停止")
         
+        # 循环中不变的配置提前取出
+        check_timeout = monitor.config['check_timeout']
+        target_weight = monitor.config['standard_weight']
+        tolerance = monitor.config['weight_tolerance']
+        target_weight_int = round(target_weight)
+        last_minute = None  # 缓存的时间字符串对应的分钟数
+        current_time_str = ""
+        last_max_val = None  # 缓存的最大值字符串对应的最大值
+        max_str = ""
+        
         # 重置开始时间
         start_time = time.time()
         
-        # 主测量循环
-        while True:
+        # 主测量循环，停止按钮会设置stop_event
+        while not monitor.stop_event.is_set():
             # 处理LED队列（在主线程中）- 放在循环开始处理
             monitor.process_beep_queue()
             
             # 获取重量
-            weight = scale.get_stable_weight(times=5)
+            weight = scale.get_stable_weight(times=samples)
             current_time = time.time()
             elapsed_time = current_time - start_time
             
+            # 重量稳定后每次只采样一次，出现变化时恢复多次采样
+            delta = abs(weight - last_weight)
+            if delta < 0.5:
+                steady_count += 1
+                if steady_count > 3:
+                    samples = 1
+            else:
+                steady_count = 0
+                samples = 5
+            
             # 检查稳定性
-            is_stable = abs(weight - last_weight) <= 1.0
+            is_stable = delta <= 1.0
             if is_stable:
                 stable_count += 1
             else:
@@ -761,56 +847,56 @@ def main():
                 max_weight = weight
             
             # 重量检测逻辑
-            if not check_completed and elapsed_time <= monitor.config['check_timeout']:
+            if not check_completed and elapsed_time <= check_timeout:
                 # 检测期间
-                remaining_time = monitor.config['check_timeout'] - elapsed_time
-                target_weight = monitor.config['standard_weight']
-                tolerance = monitor.config['weight_tolerance']
+                remaining_time = check_timeout - elapsed_time
                 
                 # 检查是否达到目标重量
                 if abs(weight - target_weight) <= tolerance:
                     check_completed = True
                     monitor.stop_music()  # 确保音乐停止
-                    lcd.clear()
-                    lcd.print("Weight OK!", 0, 0)
-                    lcd.print(f"{weight:.1f}g Detected", 1, 0)
+                    monitor._lcd_update("Weight OK!", f"{weight:.1f}g Detected")
                     time.sleep(2)
                     print(f"\n✓ 重量检测通过: {weight:.1f}g")
                 else:
                     # 显示倒计时和当前重量
-                    lcd.clear()
-                    lcd.print(f"Check:{remaining_time:.0f}s", 0, 0)
-                    lcd.print(f"Need {target_weight:.0f}g Got{weight:.0f}g", 1, 0)
+                    # 整数格式化比%.0f快
+                    monitor._lcd_update(f"Check:{round(remaining_time):d}s",
+                                        f"Need {target_weight_int:d}g Got{round(weight):d}g")
             
-            elif not check_completed and elapsed_time > monitor.config['check_timeout']:
+            elif not check_completed and elapsed_time > check_timeout:
                 # 检测超时，未达到目标重量
                 check_completed = True
                 print(f"\n✗ 重量检测失败: 超时未达到{monitor.config['standard_weight']}g")
                 
                 if monitor.config['enable_music']:
-                    lcd.clear()
-                    lcd.print("Weight Failed!", 0, 0)
-                    lcd.print("Playing Music...", 1, 0)
+                    monitor._lcd_update("Weight Failed!", "Playing Music...")
                     monitor.start_music()
                     time.sleep(2)
             
             # 正常显示模式
-            if check_completed or elapsed_time > monitor.config['check_timeout']:
+            if check_completed or elapsed_time > check_timeout:
                 weight_str = format_weight(weight, unit)
-                stability_indicator = "●" if stable_count >= 3 else "○"
-                current_time_str = time.strftime("%H:%M")
+                stability_indicator = STABILITY_INDICATORS[stable_count >= 3]
+                # 时间字符串每分钟才重新生成一次
+                minute = int(current_time // 60)
+                if minute != last_minute:
+                    last_minute = minute
+                    current_time_str = time.strftime("%H:%M")
                 
                 # 第一行：重量 + 稳定性指示
                 line1 = f"{weight_str:>11s} {stability_indicator}"
                 # 第二行：最大值 + 时间 + 音乐状态 + 人脸检测状态
-                max_str = format_weight(max_weight, unit)
+                # 最大值很少变化，变化时才重新格式化
+                if max_weight != last_max_val:
+                    last_max_val = max_weight
+                    max_str = format_weight(max_weight, unit)
                 music_indicator = "♪" if monitor.music_playing else " "
                 face_indicator = "👁" if monitor.face_detection_active else " "
                 line2 = f"Max:{max_str:>5s}{music_indicator}{face_indicator}{current_time_str}"
                 
-                lcd.clear()
-                lcd.print(line1, 0, 0)
-                lcd.print(line2, 1, 0)
+                # 内容不变时跳过，变化时只写入变化的字符，不再每次清屏
+                monitor._lcd_update(line1, line2)
             
             # 控制台输出
             stability_text = "稳定" if stable_count >= 3 else "变化"
@@ -818,24 +904,24 @@ def main():
             face_status = " [人脸检测中]" if monitor.face_detection_active else ""
             print(f"重量: {weight:8.2f}g ({stability_text}){music_status}{face_status}", end='\r')
             
-            time.sleep(0.3)
+            # 等待下一轮测量，期间若有LED请求则立即唤醒处理
+            if monitor.queue_ready.wait(timeout=0.3):
+                monitor.queue_ready.clear()
+                monitor.process_beep_queue()
             
     except KeyboardInterrupt:
         print("\n\n测量已停止")
+        monitor.stop_event.set()
         monitor.stop_music()
         monitor.cleanup_camera()
         monitor.cleanup_led()
-        lcd.clear()
-        lcd.print("Measurement", 0, 0)
-        lcd.print("Stopped", 1, 0)
+        monitor._lcd_update("Measurement", "Stopped")
     except Exception as e:
         print(f"\n发生错误: {e}")
         monitor.stop_music()
         monitor.cleanup_camera()
         monitor.cleanup_led()
-        lcd.clear()
-        lcd.print("Error!", 0, 0)
-        lcd.print(str(e)[:16], 1, 0)
+        monitor._lcd_update("Error!", str(e)[:16])
     finally:
         print("正在清理资源...")
         monitor.stop_music()
@@ -151,15 +151,15 @@ class WeightLCDDisplay:
         }
         
         try:
-            if os.path.exists(config_file):
-                with open(config_file, 'r', encoding='utf-8') as f:
-                    config = json.load(f)
-                for key, value in default_config.items():
-                    if key not in config:
-                        config[key] = value
-                return config
-            else:
-                return default_config
+            # 直接打开，文件不存在时使用默认配置，省去一次exists检查
+            with open(config_file, 'r', encoding='utf-8') as f:
+                config = json.load(f)
+            for key, value in default_config.items():
+                if key not in config:
+                    config[key] = value
+            return config
+        except FileNotFoundError:
+            return default_config
         except Exception as e:
             print(f"加载监控配置失败: {e}")
             return default_config